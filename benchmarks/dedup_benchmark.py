@@ -0,0 +1,75 @@
+"""
+Compares the old substring scan over the site history with the DedupIndex lookups.
+
+Usage:
+    python benchmarks/dedup_benchmark.py [history_rows] [listing_items]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import DedupIndex, canonical_href, canonical_title
+
+
+def build_history(rows):
+    """
+    Builds a fake site history of absolute links and titles.
+    """
+    links = [f"https://www.example.com/videos/scene-{i}-{random.randint(0, 10**6)}/" for i in range(rows)]
+    titles = [f"Scene Number {i}" for i in range(rows)]
+    return links, titles
+
+
+def build_listing(links, items):
+    """
+    Builds a listing page of relative links, half of them already known.
+    """
+    known = [link.replace("https://www.example.com", "").rstrip("/") for link in random.sample(links, items // 2)]
+    new = [f"/videos/new-scene-{i}" for i in range(items - len(known))]
+    return known + new
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    random.seed(0)
+    links, titles = build_history(rows)
+    listing = build_listing(links, items)
+
+    def substring_scan():
+        return [href for href in listing if all(href not in link for link in links)]
+
+    # The catalog stores canonical keys, so loading the index only hashes them.
+    href_keys = [canonical_href(link) for link in links]
+    title_keys = [canonical_title(title) for title in titles]
+
+    def build_index(use_bloom):
+        index = DedupIndex("Example", use_bloom=use_bloom, capacity=rows)
+        index.add_keys(href_keys, title_keys)
+        return index
+
+    scan_time, scan_new = timed(substring_scan, 1)
+    print(f"History rows: {rows}, listing items: {items}")
+    print(f"Substring scan:        {scan_time * 1000:10.2f} ms per listing page")
+
+    for use_bloom in (False, True):
+        label = "Bloom filter" if use_bloom else "Hash set"
+        build_time, index = timed(lambda: build_index(use_bloom), 1)
+        lookup_time, index_new = timed(lambda: [href for href in listing if not index.has_href(href)], 100)
+        assert index_new == scan_new, f"{label} disagrees with the substring scan"
+        print(f"{label + ' build:':22} {build_time * 1000:10.2f} ms once per run")
+        print(f"{label + ' lookups:':22} {lookup_time * 1000:10.2f} ms per listing page")
+
+
+if __name__ == "__main__":
+    main()
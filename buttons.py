@@ -1,4 +1,4 @@
-import time
+import threading
 
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException, ElementNotInteractableException
 from selenium.webdriver.support.wait import WebDriverWait
@@ -7,6 +7,7 @@ from selenium.webdriver.common.by import By
 
 
 from common import Utils, CustomLogger
+from waits import PageWaits
 
 
 class InteractWithButtons:
@@ -26,6 +27,14 @@ class InteractWithButtons:
         self.site_name = site_name
         self.logger = CustomLogger()
         self.xpaths = Utils.load_configs(self.site_name)
+        self.stop_event = threading.Event()
+        self.waits = PageWaits(driver, site_name)
+
+    def stop(self):
+        """
+        Stops the background ad button loop, so the driver can be handed to another site.
+        """
+        self.stop_event.set()
 
     def enter_button(self):
         """
@@ -42,10 +51,8 @@ class InteractWithButtons:
 
         for xpath in enter_btt_xpaths:
             try:
-                enter = WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.XPATH, xpath)))
-                self.driver.execute_script("arguments[0].scrollIntoView();", enter)
-                time.sleep(0.5)
-                self.driver.execute_script("arguments[0].click();", enter)
+                enter = self.waits.present((By.XPATH, xpath), kind="enter_button", timeout=15)
+                self.waits.click(enter)
                 self.logger.log("Entered the site", level='INFO', site=self.site_name)
                 break
             except NoSuchElementException as nse_error:
@@ -77,10 +84,8 @@ class InteractWithButtons:
 
         for xpath in enter_btt_xpaths:
             try:
-                enter = WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.XPATH, xpath)))
-                self.driver.execute_script("arguments[0].scrollIntoView();", enter)
-                time.sleep(0.5)
-                self.driver.execute_script("arguments[0].click();", enter)
+                enter = self.waits.present((By.XPATH, xpath), kind="enter_button", timeout=15)
+                self.waits.click(enter)
                 self.logger.log("Entered the site", level='INFO', site=self.site_name)
                 break
             except NoSuchElementException as nse_error:
@@ -112,14 +117,12 @@ class InteractWithButtons:
 
         for xpath in video_btt_xpaths:
             try:
-                video = WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.XPATH, xpath)))
+                video = self.waits.present((By.XPATH, xpath), kind="video_button", timeout=10)
                 try:
                     video.click()
                 except WebDriverException:
-                    self.driver.execute_script("arguments[0].scrollIntoView();", video)
-                    time.sleep(0.5)
-                    self.driver.execute_script("arguments[0].click();", video)
-                    time.sleep(3)
+                    self.waits.click(video, settle=False)
+                    self.waits.network_idle()
                 self.logger.log("Video clicked", level='INFO', site=self.site_name)
                 break
             except NoSuchElementException as nse_error:
@@ -157,11 +160,8 @@ class InteractWithButtons:
 
         for xpath in expand_btt_xpaths:
             try:
-                expand = WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, xpath)))
-                self.driver.execute_script("arguments[0].scrollIntoView();", expand)
-                time.sleep(0.5)
-                self.driver.execute_script("arguments[0].click();", expand)
-                time.sleep(1)
+                expand = self.waits.present((By.XPATH, xpath), kind="expand_desc_button", timeout=5)
+                self.waits.click(expand)
                 self.logger.log("Expanded description", level='INFO', site=self.site_name)
                 break
             except NoSuchElementException as nse_error:
@@ -193,11 +193,8 @@ class InteractWithButtons:
 
         for xpath in expand_btt_xpaths:
             try:
-                expand_tags = WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, xpath)))
-                self.driver.execute_script("arguments[0].scrollIntoView();", expand_tags)
-                time.sleep(0.5)
-                self.driver.execute_script("arguments[0].click();", expand_tags)
-                time.sleep(1)
+                expand_tags = self.waits.present((By.XPATH, xpath), kind="expand_tags_button", timeout=5)
+                self.waits.click(expand_tags)
                 self.logger.log("Expanded tags", level='INFO', site=self.site_name)
                 break
             except NoSuchElementException as nse_error:
@@ -226,13 +223,11 @@ class InteractWithButtons:
             return None
         if not ad_btt_xpaths:
             return None
-        while True:
+        while not self.stop_event.is_set():
             for xpath in ad_btt_xpaths:
                 try:
                     click_ad = WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.XPATH, xpath)))
-                    self.driver.execute_script("arguments[0].scrollIntoView();", click_ad)
-                    time.sleep(0.5)
-                    self.driver.execute_script("arguments[0].click();", click_ad)
+                    self.waits.click(click_ad, settle=False)
                     self.logger.log("Ad button clicked", level='INFO', site=self.site_name)
                     continue
                 except NoSuchElementException as nse_error:
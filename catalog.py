@@ -0,0 +1,247 @@
+import os
+import sqlite3
+import threading
+
+from common import Paths, Utils, CustomLogger
+from dedup import canonical_href, canonical_title
+
+
+class ScrapeCatalog:
+    """
+    SQLite catalog of already scraped items, keyed by site, used for deduplication.
+    Links and titles are stored under normalized keys with unique indexes, so checking
+    an item is an indexed lookup instead of a scan over the whole site history.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS hrefs (
+            site TEXT NOT NULL,
+            href_key TEXT NOT NULL,
+            href TEXT,
+            added_at TEXT,
+            PRIMARY KEY (site, href_key)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS titles (
+            site TEXT NOT NULL,
+            title_key TEXT NOT NULL,
+            title TEXT,
+            added_at TEXT,
+            PRIMARY KEY (site, title_key)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS sites (
+            site TEXT PRIMARY KEY,
+            imported_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS watermarks (
+            site TEXT PRIMARY KEY,
+            href_key TEXT,
+            href TEXT,
+            date TEXT,
+            updated_at TEXT
+        );
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Opens the catalog database in WAL mode and creates the tables if needed.
+
+        Args:
+            db_path (str, optional): Path to the database file.
+        """
+        self.db_path = db_path or os.path.join(Paths().data_dir, "catalog.db")
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        self.lock = threading.Lock()
+        self.logger = CustomLogger()
+
+    def ensure_site(self, site_name, storage):
+        """
+        Imports the stored history of a site into the catalog the first time the site is seen.
+
+        Args:
+            site_name (str): The name of the site.
+            storage: The storage backend holding the site history.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM sites WHERE site = ?", (site_name,)).fetchone()
+        if row:
+            return None
+
+        links, titles = storage.existing_data(site_name)
+        self.add(site_name, links, titles)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO sites (site, imported_at) VALUES (?, ?)",
+                (site_name, Utils.get_current_datetime()))
+        self.logger.log(f"Imported {len(links)} links into the catalog",
+                        level='INFO',
+                        site=site_name)
+        return None
+
+    def add(self, site_name, links, titles):
+        """
+        Adds links and titles of a site to the catalog, ignoring the ones already known.
+
+        Args:
+            site_name (str): The name of the site.
+            links (list): Links of the scraped items.
+            titles (list): Titles of the scraped items.
+
+        Returns:
+            None
+        """
+        added_at = Utils.get_current_datetime()
+        href_rows = [(site_name, canonical_href(link), link, added_at) for link in links]
+        title_rows = [(site_name, canonical_title(title), title, added_at) for title in titles]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO hrefs (site, href_key, href, added_at) VALUES (?, ?, ?, ?)",
+                [row for row in href_rows if row[1]])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO titles (site, title_key, title, added_at) VALUES (?, ?, ?, ?)",
+                [row for row in title_rows if row[1]])
+
+    def record(self, site_name, data):
+        """
+        Adds freshly scraped rows to the catalog.
+
+        Args:
+            site_name (str): The name of the site.
+            data (list): Scraped rows in the storage column order.
+
+        Returns:
+            None
+        """
+        self.add(site_name, [row[7] for row in data], [row[2] for row in data])
+
+    def is_known_href(self, site_name, href):
+        """
+        Checks whether a link of a site is already in the catalog.
+        """
+        href_key = canonical_href(href)
+        if href_key is None:
+            return False
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM hrefs WHERE site = ? AND href_key = ?", (site_name, href_key)).fetchone()
+        return row is not None
+
+    def is_known_title(self, site_name, title):
+        """
+        Checks whether a title of a site is already in the catalog.
+        """
+        title_key = canonical_title(title)
+        if title_key is None:
+            return False
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM titles WHERE site = ? AND title_key = ?", (site_name, title_key)).fetchone()
+        return row is not None
+
+    def count(self, site_name):
+        """
+        Returns the number of links stored for a site.
+        """
+        with self.lock:
+            (count,) = self.connection.execute(
+                "SELECT COUNT(*) FROM hrefs WHERE site = ?", (site_name,)).fetchone()
+        return count
+
+    def href_keys(self, site_name):
+        """
+        Returns the canonical link keys stored for a site.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT href_key FROM hrefs WHERE site = ?", (site_name,)).fetchall()
+        return [href_key for (href_key,) in rows]
+
+    def title_keys(self, site_name):
+        """
+        Returns the canonical title keys stored for a site.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT title_key FROM titles WHERE site = ?", (site_name,)).fetchall()
+        return [title_key for (title_key,) in rows]
+
+    def known_hrefs(self, site_name, hrefs):
+        """
+        Returns the subset of the given links which are already in the catalog, using a bulk IN query.
+
+        Args:
+            site_name (str): The name of the site.
+            hrefs (list): Links to check.
+
+        Returns:
+            set: The known links.
+        """
+        keys = {}
+        for href in hrefs:
+            href_key = canonical_href(href)
+            if href_key is not None:
+                keys.setdefault(href_key, []).append(href)
+        known = set()
+        key_list = list(keys)
+        # SQLite limits the number of bound parameters per statement.
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            with self.lock:
+                rows = self.connection.execute(
+                    f"SELECT href_key FROM hrefs WHERE site = ? AND href_key IN ({placeholders})",
+                    (site_name, *chunk)).fetchall()
+            for (href_key,) in rows:
+                known.update(keys[href_key])
+        return known
+
+    def watermark(self, site_name):
+        """
+        Returns the high-water mark of a site: the newest item of its listing at the last run.
+
+        Args:
+            site_name (str): The name of the site.
+
+        Returns:
+            dict: The canonical key of the newest link and the newest date ("Jan 08, 2020"),
+                  or None if the site has no mark yet.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT href_key, date FROM watermarks WHERE site = ?", (site_name,)).fetchone()
+        if row is None:
+            return None
+        return {"href_key": row[0], "date": row[1]}
+
+    def set_watermark(self, site_name, href, date=None):
+        """
+        Moves the high-water mark of a site. The previous date is kept when no date is given.
+
+        Args:
+            site_name (str): The name of the site.
+            href (str): The link of the newest item of the listing.
+            date (str, optional): The newest date scraped ("Jan 08, 2020").
+        """
+        href_key = canonical_href(href)
+        if href_key is None:
+            return None
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO watermarks (site, href_key, href, date, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(site) DO UPDATE SET href_key = excluded.href_key, href = excluded.href, "
+                "date = COALESCE(excluded.date, watermarks.date), updated_at = excluded.updated_at",
+                (site_name, href_key, href, date, Utils.get_current_datetime()))
+        return None
+
+    def close(self):
+        """
+        Closes the catalog database.
+        """
+        with self.lock:
+            self.connection.close()
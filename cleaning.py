@@ -0,0 +1,161 @@
+import re
+import threading
+
+
+# Cleaning applied to every site, merged field by field with the "cleaning"
+# block of the site configuration.
+DEFAULT_CLEANING = {
+    "title": {"case": "title"},
+    "description": {"remove": ["Synopsis", "DESCRIPTION:", "Description:", "Episode Summary"]},
+    "tags": {"case": "title", "remove": [","], "memoize": True},
+    "models": {"case": "title", "remove": [","], "prefixes": ["Starring:"], "memoize": True},
+}
+
+# Above this many single characters to remove, one str.translate beats chained replaces.
+TRANSLATE_THRESHOLD = 4
+
+# Most cleaned texts kept by a memoized cleaner.
+MEMO_SIZE = 4096
+
+CASES = {
+    "title": str.title,
+    "lower": str.lower,
+    "upper": str.upper,
+}
+
+
+def chained_cleaner(case, first, second=None):
+    """
+    Returns a cleaner which makes the case change and one or two replaces as a single
+    chain of calls, like the old per-field lambdas, without any per-call branching.
+    """
+    if second is None:
+        def clean(text):
+            if text is None:
+                return None
+            return case(text).replace(first, "").strip()
+    else:
+        def clean(text):
+            if text is None:
+                return None
+            return case(text).replace(first, "").replace(second, "").strip()
+    return clean
+
+
+def memoized(clean, size=MEMO_SIZE):
+    """
+    Wraps a cleaner with a memo of its results. Tags and model names come from a small
+    vocabulary repeated on every item of a site, so most of them are cleaned only once.
+    At most size texts are kept; later ones are cleaned on every call.
+    """
+    seen = {}
+
+    def cached(text):
+        cleaned = seen.get(text)
+        if cleaned is None:
+            cleaned = clean(text)
+            if len(seen) < size:
+                seen[text] = cleaned
+        return cleaned
+
+    return cached
+
+
+def compile_cleaner(spec):
+    """
+    Compiles a cleaning spec into a single function. The spec may set:
+        case (str): "title", "lower" or "upper", applied first.
+        remove (list): Strings removed anywhere in the text.
+        prefixes (list): Strings removed from the start of the text, ignoring case.
+        memoize (bool): Keep the results, for fields whose texts repeat.
+    Newlines are always removed and the result is stripped.
+
+    The removals are bound once into the function. A few removals run as chained
+    str.replace calls, which beat a regex alternation and str.translate on short
+    scraped texts; a larger set of single characters goes into one translate table.
+    The usual specs of titles and tags, with at most two removals and no prefixes,
+    become one chain of calls.
+
+    Args:
+        spec (dict): The cleaning spec of a field.
+
+    Returns:
+        callable: Takes the raw text and returns the cleaned text; None stays None.
+    """
+    case = CASES.get(spec.get("case") or "")
+    remove = ["\n"] + [text for text in spec.get("remove", []) if text and text != "\n"]
+    prefixes = [text for text in spec.get("prefixes", []) if text]
+
+    characters = "".join(text for text in remove if len(text) == 1)
+    table = None
+    if len(characters) > TRANSLATE_THRESHOLD:
+        table = str.maketrans("", "", characters)
+        remove = [text for text in remove if len(text) > 1]
+    remove = tuple(sorted(remove, key=len, reverse=True))
+    prefix_pattern = None
+    if prefixes:
+        prefix_pattern = re.compile(r"\s*(?:%s)\s*" % "|".join(
+            re.escape(prefix) for prefix in sorted(prefixes, key=len, reverse=True)), re.IGNORECASE)
+    if table is None and prefix_pattern is None and len(remove) <= 2:
+        clean = chained_cleaner(case or str, *remove)
+        return memoized(clean) if spec.get("memoize") else clean
+
+    def clean(text):
+        if text is None:
+            return None
+        if case is not None:
+            text = case(text)
+        if table is not None:
+            text = text.translate(table)
+        for removed in remove:
+            text = text.replace(removed, "")
+        if prefix_pattern is not None:
+            match = prefix_pattern.match(text)
+            if match:
+                text = text[match.end():]
+        return text.strip()
+
+    return memoized(clean) if spec.get("memoize") else clean
+
+
+class TextCleaners:
+    """
+    Compiled cleaning functions of a site, for titles, descriptions, tags and models.
+    Built once per site from its configuration and rebuilt when the configuration
+    file changes; shared by the lxml and Selenium paths.
+    """
+    _cleaners = {}
+    _cleaners_lock = threading.Lock()
+
+    def __init__(self, config):
+        """
+        Initializes the TextCleaners object.
+
+        Args:
+            config (dict): The configuration of a site.
+        """
+        site_cleaning = config.get("cleaning", {})
+        self.cleaners = {
+            field: compile_cleaner({**default, **site_cleaning.get(field, {})})
+            for field, default in DEFAULT_CLEANING.items()
+        }
+
+    @classmethod
+    def for_config(cls, config):
+        """
+        Returns the cleaners of a site configuration, building them on first use
+        and again when the configuration has been reloaded.
+        """
+        site = config.get("site")
+        with cls._cleaners_lock:
+            cached = cls._cleaners.get(site)
+            if cached is None or cached[0] is not config:
+                cached = (config, cls(config))
+                cls._cleaners[site] = cached
+            return cached[1]
+
+    def clean(self, field, text):
+        """
+        Cleans a text of a field: "title", "description", "tags" or "models".
+        """
+        return self.cleaners[field](text)
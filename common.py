@@ -2,6 +2,9 @@ import os
 import re
 import json
 import time
+import queue
+import atexit
+import threading
 
 
 from anyio import Path
@@ -136,27 +139,256 @@ class CustomLogger:
 
         if exception:
             log_entry += "\n" + str(exception)
-        folder_path = os.path.join(Paths().log_dir, folder_name)
-        os.makedirs(folder_path, exist_ok=True)
 
         if level in ['INFO', 'PATH', 'MISC']:
             level = 'INFO'
-        log_file = os.path.join(folder_path, f"{level.lower()}.log")
 
-        with open(log_file, 'a') as f:
-            f.write(log_entry + '\n')
+        LogWriter.get().write(folder_name, f"{level.lower()}.log", log_entry)
 
-        main_log_file = os.path.join(folder_path, "main.log")
-        with open(main_log_file, 'a') as f:
-            f.write(log_entry + '\n')
+
+class LogWriter:
+    """
+    Writes log entries to the log files from one background thread.
+    Entries are queued by CustomLogger.log, written in batches to file handles
+    which stay open for the day, and flushed once per batch. Every entry goes
+    to its level file and to main.log of the folder of its day.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, batch_size=500, flush_interval=1.0):
+        """
+        Initializes the LogWriter object and starts the writer thread.
+
+        Args:
+            batch_size (int): Maximum number of entries written per batch.
+            flush_interval (float): Seconds the writer waits for new entries before checking again.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        self.handles = {}
+        self.folder_name = None
+        self.thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def get(cls):
+        """
+        Returns the writer of the current process. A worker process forked from
+        another one gets its own writer, as the writer thread does not survive a fork.
+        """
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance.pid != os.getpid():
+                cls._instance = cls()
+            return cls._instance
+
+    def write(self, folder_name, file_name, log_entry):
+        """
+        Queues a log entry.
+
+        Args:
+            folder_name (str): Name of the folder of the day.
+            file_name (str): Name of the level log file.
+            log_entry (str): The formatted log entry.
+        """
+        self.queue.put((folder_name, file_name, log_entry))
+
+    def _handle(self, folder_name, file_name):
+        """
+        Returns the open handle of a log file. The handles of the previous day are
+        closed when the first entry of a new day arrives.
+        """
+        if folder_name != self.folder_name:
+            self._close_handles()
+            self.folder_name = folder_name
+            os.makedirs(os.path.join(Paths().log_dir, folder_name), exist_ok=True)
+        if file_name not in self.handles:
+            self.handles[file_name] = open(
+                os.path.join(Paths().log_dir, folder_name, file_name), 'a', encoding='utf-8')
+        return self.handles[file_name]
+
+    def _close_handles(self):
+        """
+        Closes all open log files.
+        """
+        for handle in self.handles.values():
+            handle.close()
+        self.handles = {}
+
+    def _write_batch(self, batch):
+        """
+        Writes a batch of entries and flushes the log files once.
+        """
+        for folder_name, file_name, log_entry in batch:
+            self._handle(folder_name, file_name).write(log_entry + '\n')
+            self._handle(folder_name, "main.log").write(log_entry + '\n')
+        for handle in self.handles.values():
+            handle.flush()
+
+    def _run(self):
+        """
+        Writes queued entries in batches until the stop marker is received.
+        """
+        running = True
+        while running:
+            try:
+                entry = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while entry is not None:
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if entry is None:
+                running = False
+            try:
+                self._write_batch(batch)
+            except OSError as e:
+                print(f"{Colors.color('RED')}Failed to write log files: {e}{Colors.RESET}")
+        self._close_handles()
+
+    def close(self):
+        """
+        Writes the remaining entries, closes the log files and stops the writer thread.
+        """
+        if self.pid != os.getpid() or not self.thread.is_alive():
+            return None
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+        return None
+
+
+class ConfigRegistry:
+    """
+    Process-wide cache of parsed JSON configuration files.
+    A file is parsed once and parsed again only when its modification time changes,
+    so edits are picked up by a long-running process without a restart.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    _cache = {}
+    _lock = threading.Lock()
+    _overrides = {}
+    _merged = {}
+
+    @classmethod
+    def load(cls, filename, transform=None):
+        """
+        Returns the parsed content of a JSON file next to the scripts.
+
+        Args:
+            filename (str): Name of the JSON file.
+            transform (callable, optional): Applied once to the parsed content, e.g. to build an index.
+
+        Returns:
+            The (transformed) content of the file, or an empty dict if the file does not exist.
+        """
+        path = os.path.join(cls.script_dir, filename)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+
+        with cls._lock:
+            cached = cls._cache.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+        with open(path, 'r', encoding='utf-8') as json_file:
+            content = json.load(json_file)
+        if transform is not None:
+            content = transform(content)
+
+        with cls._lock:
+            cls._cache[path] = (mtime, content)
+        return content
+
+    @classmethod
+    def sites(cls):
+        """
+        Returns the site configurations indexed by lower-cased site name.
+        """
+        return cls.load('sites_config.json', lambda xpaths: {key.lower(): value for key, value in xpaths.items()})
+
+    @classmethod
+    def site(cls, site):
+        """
+        Returns the configuration of a site with the overrides set in this process.
+        The merged configuration is cached, so repeated calls return the same object.
+
+        Args:
+            site (str): The name of the site.
+
+        Returns:
+            dict: The configuration of the site, empty if the site is unknown.
+        """
+        key = site.lower()
+        base = cls.sites().get(key, {})
+        with cls._lock:
+            overrides = cls._overrides.get(key)
+            if not overrides:
+                return base
+            cached = cls._merged.get(key)
+            if cached is None or cached[0] is not base or cached[1] is not overrides:
+                cached = (base, overrides, {**base, **overrides})
+                cls._merged[key] = cached
+            return cached[2]
+
+    @classmethod
+    def override(cls, site, **values):
+        """
+        Overrides keys of a site configuration in this process, e.g. its scrape method.
+        Called without values, removes the overrides of the site.
+
+        Args:
+            site (str): The name of the site.
+            **values: The overridden keys and their values.
+        """
+        key = site.lower()
+        with cls._lock:
+            if values:
+                if cls._overrides.get(key) != values:
+                    cls._overrides[key] = dict(values)
+            else:
+                cls._overrides.pop(key, None)
+                cls._merged.pop(key, None)
+
+    @classmethod
+    def settings(cls):
+        """
+        Returns the global settings.
+        """
+        return cls.load('settings.json')
 
 
 class Paths:
     """
     Manages file paths and directory creation.
+    There is one instance per class and process: the directories are created
+    once, and the Tk root is only built when a GUI prompt is actually needed.
     """
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls):
+        """
+        Returns the instance of the class, creating it on first use.
+        """
+        with Paths._instances_lock:
+            if cls not in Paths._instances:
+                instance = super().__new__(cls)
+                instance._initialize()
+                Paths._instances[cls] = instance
+            return Paths._instances[cls]
 
-    def __init__(self):
+    def _initialize(self):
         """
         Initializes Paths object.
         """
@@ -169,15 +401,32 @@ class Paths:
         self.video_dir = os.path.join(self.home_dir, self.data_dir, "Videos", "Auto Downloaded Trailers")
         self.raw_data_dir = os.path.join(self.home_dir, self.data_dir, "Raw Data")
         self.log_dir = os.path.join(self.home_dir, self.data_dir, "Logs")
+        self.store_dir = os.path.join(self.home_dir, self.data_dir, "Store")
+        self.media_store_dir = os.path.join(self.home_dir, self.data_dir, "Media Store")
         self.daily_scrapped = ""
         self.site_scrapped = ""
-        self.schedule_data = ""
-        self.root = tk.Tk()
-        self.root.withdraw()
+        self._root = None
         self.create_directories()
         self.date_utils = Utils()
         self.logger = CustomLogger()
 
+    @property
+    def root(self):
+        """
+        Returns the hidden Tk root used as parent of GUI prompts, creating it on first use.
+        """
+        if self._root is None:
+            self._root = tk.Tk()
+            self._root.withdraw()
+        return self._root
+
+    @staticmethod
+    def can_prompt():
+        """
+        Checks whether a display is available for GUI prompts.
+        """
+        return os.name == "nt" or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
     def set_daily_scrapped(self):
         """
         Set the file path for the daily scrapped data and create an Excel file if it does not exist.
@@ -185,15 +434,16 @@ class Paths:
         Returns:
             str: File path for the daily scrapped data Excel file.
         """
-        self.daily_scrapped = os.path.join(
+        daily_scrapped = os.path.join(
             self.raw_data_dir, f"DailyScrapped+{self.date_utils.get_current_date()}.xlsx")
 
-        if not os.path.exists(self.daily_scrapped):
+        if not os.path.exists(daily_scrapped):
             df = pd.DataFrame(columns=["Site", "Date", "Title", "Description", "Tags", "Models", "Video to embed",
                                        "Link for video", "Link for image", "Path image", "Path video"])
-            df.to_excel(self.daily_scrapped, index=False)
+            df.to_excel(daily_scrapped, index=False)
 
-        return self.daily_scrapped
+        self.daily_scrapped = daily_scrapped
+        return daily_scrapped
 
     def set_site_scrapped(self, site_name):
         """
@@ -202,28 +452,14 @@ class Paths:
         Returns:
             str: File path for the site scrapped data Excel file.
         """
-        self.site_scrapped = os.path.join(
+        site_scrapped = os.path.join(
             self.desktop_dir, f"{site_name}.xlsx")
-        if not os.path.exists(self.site_scrapped):
+        if not os.path.exists(site_scrapped):
             df = pd.DataFrame(columns=["Site", "Date", "Title", "Description", "Tags", "Models", "Video to embed",
                                        "Link for video", "Link for image", "Path image", "Path video"])
-            df.to_excel(self.site_scrapped, index=False)
-        return self.site_scrapped
-
-    def set_schedule_dataframe(self):
-        """
-        Set the file path for the scheduling data Excel file and create it if it does not exist.
-
-        Returns:
-            str: File path for the scheduling data Excel file.
-        """
-        self.schedule_data = os.path.join(
-            self.data_dir, "SitesScheduling.xlsx")
-        if not os.path.exists(self.schedule_data):
-            df = pd.DataFrame()
-            df.to_excel(self.schedule_data, index=False)
-
-        return self.schedule_data
+            df.to_excel(site_scrapped, index=False)
+        self.site_scrapped = site_scrapped
+        return site_scrapped
 
     def create_video_path(self, site_name, counter_vid):
         """
@@ -244,13 +480,14 @@ class Paths:
 
         return path_video
 
-    def create_image_path(self, site_name, counter_img):
+    def create_image_path(self, site_name, counter_img, extension="jpg"):
         """
         Create a path for a image file based on the site name and image counter.
 
         Parameters:
             site_name (str): Name of the site.
             counter_img (int): Counter for the image.
+            extension (str): File extension of the image format.
 
         Returns:
             str: Path for the image file.
@@ -260,7 +497,7 @@ class Paths:
         os.makedirs(folder_path_image, exist_ok=True)
 
         path_image = os.path.join(
-            folder_path_image, f"{self.date_utils.get_current_datetime()}-{counter_img}.jpg")
+            folder_path_image, f"{self.date_utils.get_current_datetime()}-{counter_img}.{extension}")
 
         return path_image
 
@@ -274,6 +511,8 @@ class Paths:
         os.makedirs(self.video_dir, exist_ok=True)
         os.makedirs(self.raw_data_dir, exist_ok=True)
         os.makedirs(self.log_dir, exist_ok=True)
+        os.makedirs(self.store_dir, exist_ok=True)
+        os.makedirs(self.media_store_dir, exist_ok=True)
 
 
 class DataFrames(Paths):
@@ -347,10 +586,18 @@ class DataFrames(Paths):
 
     def manual_retry_prompt(self, output_path, max_retries, data):
         """ Display retry prompt """
+        if not self.can_prompt():
+            self.logger.log(
+                "No display available for the retry prompt",
+                level='ERROR',
+                site="DataFrame"
+            )
+            return False
         retry_count = 0
         while retry_count < max_retries:
             retry = messagebox.askretrycancel(
-                "Retry", f"Exceeded the maximum number of retry attempts to save file {output_path}. Retry? ({retry_count + 1}/{max_retries})")
+                "Retry", f"Exceeded the maximum number of retry attempts to save file {output_path}. Retry? ({retry_count + 1}/{max_retries})",
+                parent=self.root)
             if retry:
                 retry_count += 1
                 try:
@@ -371,68 +618,23 @@ class DataFrames(Paths):
                 return False
         return False
 
-    def read_save_schedule_df(self, list_name):
-        """ 
-        Read and save schedule data to Excel file.
-
-        Parameters:
-            list_name (str): Name of the list.
-
-        Returns:
-            str: Status of the list for the current date.
-        """
-        self.set_schedule_dataframe()
-        existing_df = pd.read_excel(self.schedule_data, index_col=0)
-
-        current_date = Utils.get_current_date()
-
-        if current_date not in existing_df.columns:
-            new_col = pd.DataFrame(columns=[current_date])
-            existing_df = pd.concat([existing_df, new_col], axis=1, sort=False)
-
-        try:
-            if pd.isna(existing_df.at[list_name, current_date]):
-                existing_df.at[list_name, current_date] = 'No'
-        except KeyError:
-            existing_df.loc[list_name, current_date] = 'No'
-
-        existing_df = existing_df.reindex(
-            sorted(existing_df.columns, reverse=True), axis=1)
-        existing_df.to_excel(self.schedule_data, index=True)
-
-        return existing_df.at[list_name, current_date]
-
-    def update_schedule_df(self, list_name):
-        """ 
-        Update schedule data in Excel file.
-
-        Parameters:
-            list_name (str): Name of the list.
-        """
-        self.set_schedule_dataframe()
-        existing_df = pd.read_excel(self.schedule_data, index_col=0)
-
-        current_date = Utils.get_current_date()
-
-        try:
-            existing_df.at[list_name, current_date] = 'Yes'
-        except KeyError:
-            existing_df.loc[list_name, current_date] = 'Yes'
-
-        existing_df = existing_df.reindex(
-            sorted(existing_df.columns, reverse=True), axis=1)
-        existing_df.to_excel(self.schedule_data, index=True)
-
 
 class Utils:
     """
     Utility class for common functions.
     """
     @staticmethod
-    def setup_chrome_driver(headless=True):
+    def setup_chrome_driver(headless=True, driver_path=None, page_load_strategy=None, block_images=False):
         """
         Setup chrome driver.
 
+        Args:
+            headless (bool): Whether Chrome runs headless.
+            driver_path (str, optional): Path of an already resolved chromedriver binary.
+            page_load_strategy (str, optional): "normal", "eager" or "none"; "eager" returns
+                                                from page loads once the DOM is ready.
+            block_images (bool): Whether Chrome skips loading images.
+
         Returns:
         driver.
         """
@@ -452,7 +654,15 @@ class Utils:
         if headless:
             chrome_options.add_argument("--headless")
 
-        service = Service(ChromeDriverManager().install())
+        if page_load_strategy:
+            chrome_options.page_load_strategy = page_load_strategy
+
+        if block_images:
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option(
+                "prefs", {"profile.managed_default_content_settings.images": 2})
+
+        service = Service(driver_path or ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
 
         return driver
@@ -547,12 +757,20 @@ class Utils:
         Returns:
             dict: A dictionary of xpaths for the given site.
         """
-        with open(os.path.join(Paths().script_dir, 'sites_config.json'), 'r', encoding='utf-8') as json_file:
-            xpaths = json.load(json_file)
+        return ConfigRegistry.site(site)
 
-            xpaths_lower = {key.lower(): value for key, value in xpaths.items()}
+    @staticmethod
+    def load_settings(section):
+        """
+        Load a section of the global settings from a JSON file.
 
-            return xpaths_lower.get(site.lower(), {})
+        Args:
+            section (str): The name of the settings section.
+
+        Returns:
+            dict: A dictionary of settings for the given section.
+        """
+        return ConfigRegistry.settings().get(section, {})
 
     @staticmethod
     def extract_site_name(url):
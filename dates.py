@@ -0,0 +1,149 @@
+import re
+import threading
+import functools
+from datetime import datetime
+
+from dateutil.parser import parse, ParserError
+
+
+DATE_OUTPUT_FORMAT = "%b %d, %Y"
+
+# Formats tried with strptime before falling back to dateutil, in order.
+# Month-first comes before day-first, as with dateutil.
+KNOWN_FORMATS = (
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%b %d %Y",
+    "%B %d %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%d %b, %Y",
+    "%d %B, %Y",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%m-%d-%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%m/%d/%y",
+    "%d.%m.%y",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+# Noise around the dates: labels ("Published", "Release Date:", ...), ordinal
+# suffixes ("5th") and the fields which follow the date ("Available ...", "Runtime ...").
+NOISE_PATTERN = re.compile(r"""
+      \b(?:date\s+added|release\s+date|published|released|added\s+on|added|uploaded|updated|posted|date)\b\s*:?\s*
+    | (?<=\d)(?:st|nd|rd|th)\b
+    | \s*\b(?:available|runtime)\b.*$
+""", re.IGNORECASE | re.VERBOSE | re.DOTALL)
+
+SEPARATOR_PATTERN = re.compile(r"\s*[|•📅]\s*")
+
+
+@functools.lru_cache(maxsize=8192)
+def date_candidates(text):
+    """
+    Returns the strings a raw date text may hold a date in: the text without noise,
+    then each part between separators ("|", "•", "📅"), then the part after a label
+    ending with a colon.
+
+    Args:
+        text (str): The raw date text.
+
+    Returns:
+        tuple: The candidate strings, in the order they are tried.
+    """
+    cleaned = " ".join(NOISE_PATTERN.sub("", text).split()).strip("|•📅 ")
+    candidates = [cleaned]
+    for segment in SEPARATOR_PATTERN.split(cleaned):
+        if segment and segment not in candidates:
+            candidates.append(segment)
+    for candidate in list(candidates):
+        head, colon, tail = candidate.partition(":")
+        if colon and tail.strip() and not any(char.isdigit() for char in head):
+            candidates.append(tail.strip())
+    return tuple(candidate for candidate in candidates if candidate)
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_date(text, formats, fallback=True):
+    """
+    Parses a raw date text. Memoized, so a text seen before costs a dict lookup.
+
+    Args:
+        text (str): The raw date text.
+        formats (tuple): strptime formats, tried in order on each candidate.
+        fallback (bool): Whether dateutil is tried when no format matches.
+
+    Returns:
+        tuple: The date formatted as "Jan 08, 2020" and the format which matched
+               (None for dateutil), or (None, None) if the text holds no date.
+    """
+    candidates = date_candidates(text)
+    for candidate in candidates:
+        for date_format in formats:
+            try:
+                return datetime.strptime(candidate, date_format).strftime(DATE_OUTPUT_FORMAT), date_format
+            except ValueError:
+                continue
+    if fallback:
+        for candidate in candidates:
+            try:
+                return parse(candidate).strftime(DATE_OUTPUT_FORMAT), None
+            except (ParserError, ValueError, OverflowError):
+                continue
+    return None, None
+
+
+class DateNormalizer:
+    """
+    Normalizes the scraped dates of a site to "Jan 08, 2020". The format which
+    parsed the last date of a site is tried first for the next ones, so a site
+    with a consistent format pays for a single strptime per new date.
+    """
+    _learned = {}
+    _lock = threading.Lock()
+
+    def __init__(self, site_name, date_format=None):
+        """
+        Initializes the DateNormalizer object.
+
+        Args:
+            site_name (str): Name of the site.
+            date_format (str, optional): The date format of the site configuration. When set,
+                                         only this format is accepted, as before.
+        """
+        self.site_name = site_name
+        self.date_format = date_format or None
+
+    def formats(self):
+        """
+        Returns the strptime formats to try, the learned format of the site first.
+        """
+        if self.date_format:
+            return (self.date_format,)
+        learned = self._learned.get(self.site_name)
+        if learned is None:
+            return KNOWN_FORMATS
+        return (learned,) + tuple(date_format for date_format in KNOWN_FORMATS if date_format != learned)
+
+    def normalize(self, text):
+        """
+        Normalizes a raw date text.
+
+        Args:
+            text (str): The raw date text.
+
+        Returns:
+            str: The date formatted as "Jan 08, 2020", or None if the text holds no date.
+        """
+        if not text:
+            return None
+        date, date_format = parse_date(text, self.formats(), fallback=not self.date_format)
+        if date_format and not self.date_format and self._learned.get(self.site_name) != date_format:
+            with self._lock:
+                self._learned[self.site_name] = date_format
+        return date
@@ -0,0 +1,205 @@
+import math
+import hashlib
+from urllib.parse import urlparse
+
+
+def canonical_href(href):
+    """
+    Returns the canonical key of a link.
+    The scheme, "www.", the host, the query string, the fragment and trailing slashes
+    are dropped and the path is lower-cased. Keys are only compared within one site,
+    so a relative link found on a listing page and the absolute link stored for the
+    same item share one key, which keeps the old "href contained in stored link" check.
+
+    Args:
+        href (str): The link to normalize.
+
+    Returns:
+        str: The canonical key, or None for an empty link.
+    """
+    if not isinstance(href, str):
+        return None
+    href = href.strip()
+    if not href or href == '-':
+        return None
+    if href.startswith("//"):
+        href = "https:" + href
+    if "://" in href:
+        path = urlparse(href).path
+    elif href.lower().startswith("www."):
+        path = urlparse("https://" + href).path
+    else:
+        path = href.split("?")[0].split("#")[0]
+    return "/" + path.strip("/").lower()
+
+
+def canonical_title(title):
+    """
+    Returns the canonical key of a title: whitespace is collapsed and the case folded.
+
+    Args:
+        title (str): The title to normalize.
+
+    Returns:
+        str: The canonical key, or None for an empty title.
+    """
+    if not isinstance(title, str):
+        return None
+    title = " ".join(title.split())
+    if not title or title == '-':
+        return None
+    return title.casefold()
+
+
+def hash_key(key):
+    """
+    Returns a 64-bit hash of a canonical key.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over canonical keys.
+    Membership tests may return false positives but never false negatives.
+    """
+
+    def __init__(self, capacity, false_positive_rate=0.001):
+        """
+        Args:
+            capacity (int): Expected number of keys.
+            false_positive_rate (float): Target false positive rate at full capacity.
+        """
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        """
+        Adds a canonical key to the filter.
+        """
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        """
+        Checks whether a canonical key may be in the filter.
+        """
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class DedupIndex:
+    """
+    In-memory dedup index of one site, so checking a listing item is O(1)
+    instead of a scan over the whole site history.
+
+    Keys are kept as 64-bit hashes in a set. With use_bloom, they are kept in a
+    Bloom filter instead, and positives are confirmed against the catalog.
+    """
+
+    def __init__(self, site_name, use_bloom=False, capacity=0, false_positive_rate=0.001, catalog=None):
+        """
+        Args:
+            site_name (str): The name of the site.
+            use_bloom (bool): Keep the keys in a Bloom filter instead of a set.
+            capacity (int): Expected number of keys, used to size the Bloom filter.
+            false_positive_rate (float): Target false positive rate of the Bloom filter.
+            catalog (ScrapeCatalog, optional): Catalog used to confirm Bloom filter positives.
+        """
+        self.site_name = site_name
+        self.catalog = catalog
+        self.use_bloom = use_bloom
+        if use_bloom:
+            self.hrefs = BloomFilter(capacity, false_positive_rate)
+            self.titles = BloomFilter(capacity, false_positive_rate)
+        else:
+            self.hrefs = set()
+            self.titles = set()
+
+    @classmethod
+    def from_catalog(cls, catalog, site_name, use_bloom=False, false_positive_rate=0.001):
+        """
+        Builds the index of a site from the keys stored in the catalog.
+
+        Args:
+            catalog (ScrapeCatalog): The scrape catalog.
+            site_name (str): The name of the site.
+            use_bloom (bool): Keep the keys in a Bloom filter instead of a set.
+            false_positive_rate (float): Target false positive rate of the Bloom filter.
+
+        Returns:
+            DedupIndex: The loaded index.
+        """
+        index = cls(site_name, use_bloom=use_bloom, capacity=catalog.count(site_name),
+                    false_positive_rate=false_positive_rate, catalog=catalog)
+        index.add_keys(catalog.href_keys(site_name), catalog.title_keys(site_name))
+        return index
+
+    def add_keys(self, href_keys, title_keys):
+        """
+        Adds already canonical link and title keys to the index.
+
+        Args:
+            href_keys (iterable): Canonical link keys.
+            title_keys (iterable): Canonical title keys.
+        """
+        for href_key in href_keys:
+            self._add(self.hrefs, href_key)
+        for title_key in title_keys:
+            self._add(self.titles, title_key)
+
+    def _add(self, keys, key):
+        if self.use_bloom:
+            keys.add(key)
+        else:
+            keys.add(hash_key(key))
+
+    def _contains(self, keys, key):
+        if self.use_bloom:
+            return key in keys
+        return hash_key(key) in keys
+
+    def add_href(self, href):
+        """
+        Adds a link to the index.
+        """
+        href_key = canonical_href(href)
+        if href_key is not None:
+            self._add(self.hrefs, href_key)
+
+    def add_title(self, title):
+        """
+        Adds a title to the index.
+        """
+        title_key = canonical_title(title)
+        if title_key is not None:
+            self._add(self.titles, title_key)
+
+    def has_href(self, href):
+        """
+        Checks whether a link is already known for the site.
+        """
+        href_key = canonical_href(href)
+        if href_key is None or not self._contains(self.hrefs, href_key):
+            return False
+        if self.use_bloom and self.catalog is not None:
+            return self.catalog.is_known_href(self.site_name, href)
+        return True
+
+    def has_title(self, title):
+        """
+        Checks whether a title is already known for the site.
+        """
+        title_key = canonical_title(title)
+        if title_key is None or not self._contains(self.titles, title_key):
+            return False
+        if self.use_bloom and self.catalog is not None:
+            return self.catalog.is_known_title(self.site_name, title)
+        return True
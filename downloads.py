@@ -0,0 +1,238 @@
+import os
+import threading
+import concurrent.futures
+from urllib.parse import urlparse
+
+import requests
+
+from common import Utils, CustomLogger
+from exceptions_handling import session
+from fetch import HEADERS, absolute_url
+from media_cache import MediaCache, file_digest
+
+
+class StreamingDownloader:
+    """
+    Downloads media files in chunks into a temporary ".part" file which is renamed
+    once complete, so memory use does not depend on the size of the file.
+    An interrupted transfer is resumed with an HTTP Range request, and the size
+    is checked against Content-Length and an optional cap.
+    Finished files are added to the media cache, and a file whose URL is already
+    cached is linked from the cache instead of downloaded again.
+    """
+    NOT_MODIFIED = "not modified"
+
+    def __init__(self, site_name, chunk_size=None, max_bytes=None, retries=None, timeout=None, cache=None):
+        """
+        Initializes the StreamingDownloader object. Arguments which are not given
+        are read from the "downloads" section of the settings.
+
+        Args:
+            site_name (str): Name of the site, used for logging.
+            chunk_size (int, optional): Size of the chunks written to disk.
+            max_bytes (int, optional): Maximum file size, None or 0 for no limit.
+            retries (int, optional): Number of attempts, each resuming the previous one.
+            timeout (int, optional): Connect and read timeout in seconds.
+            cache (MediaCache, optional): The media cache, the shared one if not given.
+        """
+        settings = Utils.load_settings("downloads")
+        self.site_name = site_name
+        self.chunk_size = chunk_size or settings.get("chunk_size", 1024 * 1024)
+        self.max_bytes = max_bytes or settings.get("max_video_bytes")
+        self.retries = retries or settings.get("retries", 3)
+        self.timeout = timeout or settings.get("timeout", 60)
+        self.cache = cache or MediaCache.shared()
+        self.logger = CustomLogger()
+
+    def _too_large(self, size):
+        """
+        Checks a size against the cap.
+        """
+        return bool(self.max_bytes) and size > self.max_bytes
+
+    def _attempt(self, url, part_path, entry=None):
+        """
+        Runs one download attempt, resuming from the existing part file if there is one.
+        A fresh attempt for a cached URL is sent as a conditional request.
+
+        Returns:
+            The response headers if the part file is complete, NOT_MODIFIED if the cached
+            file is still current, or None if the attempt should be retried.
+
+        Raises:
+            ValueError: If the file is larger than the cap.
+        """
+        existing = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = dict(HEADERS)
+        if existing:
+            headers['Range'] = f"bytes={existing}-"
+        else:
+            headers.update(MediaCache.conditional_headers(entry))
+
+        with session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304 and entry:
+                return self.NOT_MODIFIED
+            if response.status_code == 416 and existing:
+                # The part file already holds the whole content.
+                return {}
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                mode = 'ab'
+            else:
+                mode = 'wb'
+                existing = 0
+
+            content_length = response.headers.get('Content-Length')
+            expected = existing + int(content_length) if content_length and content_length.isdigit() else None
+            if expected is not None and self._too_large(expected):
+                raise ValueError(f"File of {expected} bytes is larger than the limit of {self.max_bytes} bytes")
+
+            written = existing
+            with open(part_path, mode) as part_file:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if not chunk:
+                        continue
+                    part_file.write(chunk)
+                    written += len(chunk)
+                    if self._too_large(written):
+                        raise ValueError(f"File is larger than the limit of {self.max_bytes} bytes")
+
+        if expected is not None and written != expected:
+            self.logger.log(f"Download of {url} stopped at {written} of {expected} bytes",
+                            level='WARNING',
+                            site=self.site_name)
+            return None
+        return response.headers
+
+    def _add_to_cache(self, url, path, headers):
+        """
+        Adds a finished download to the media cache, with the validators of its response.
+        """
+        if self.cache is None:
+            return None
+        extension = os.path.splitext(path)[1].lstrip(".") or "bin"
+        try:
+            self.cache.adopt(path, url, file_digest(path, self.chunk_size), extension,
+                             etag=headers.get('ETag'), last_modified=headers.get('Last-Modified'))
+        except OSError as e:
+            self.logger.log("Failed to add the download to the media cache",
+                            level='WARNING',
+                            site=self.site_name,
+                            exception=e)
+        return None
+
+    def download(self, url_site, url, path):
+        """
+        Downloads a file to the given path.
+
+        Args:
+            url_site (str): The base URL of the site, used to resolve relative links.
+            url (str): The link of the file.
+            path (str): The target path.
+
+        Returns:
+            tuple: The resolved link and the path of the saved file, or None as path if the download failed.
+        """
+        url = absolute_url(url_site, url)
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and not self.cache.revalidate:
+            return url, self.cache.link(entry["path"], path)
+
+        part_path = path + ".part"
+        for attempt in range(self.retries):
+            try:
+                result = self._attempt(url, part_path, entry)
+                if result == self.NOT_MODIFIED:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    return url, self.cache.link(entry["path"], path)
+                if result is not None:
+                    os.replace(part_path, path)
+                    self._add_to_cache(url, path, result)
+                    return url, path
+            except ValueError as size_error:
+                self.logger.log("Download skipped",
+                                level='WARNING',
+                                site=self.site_name,
+                                exception=size_error)
+                break
+            except (requests.exceptions.RequestException, OSError) as e:
+                self.logger.log(f"Attempt {attempt + 1}: download of {url} failed",
+                                level='ERROR',
+                                site=self.site_name,
+                                exception=e)
+
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return url, None
+
+
+class DownloadPipeline:
+    """
+    Download stage decoupled from page scraping. Scrapers submit download jobs and
+    keep scraping, while a bounded pool of worker threads runs the jobs with a limit
+    on the downloads running at once per host. One pipeline is shared per process.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers=None, per_host_limit=None):
+        """
+        Initializes the DownloadPipeline object. Arguments which are not given
+        are read from the "downloads" section of the settings.
+
+        Args:
+            workers (int, optional): Number of download threads.
+            per_host_limit (int, optional): Maximum number of downloads running at once per host.
+        """
+        settings = Utils.load_settings("downloads")
+        self.workers = workers or settings.get("workers", 8)
+        self.per_host_limit = per_host_limit or settings.get("per_host_limit", 4)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                              thread_name_prefix="Download")
+        self.host_semaphores = {}
+        self.host_lock = threading.Lock()
+        self.pid = os.getpid()
+        self.logger = CustomLogger()
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the pipeline shared by the whole process. A forked process gets its own
+        pipeline, as the download threads do not survive a fork.
+        """
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.pid != os.getpid():
+                cls._shared = cls()
+            return cls._shared
+
+    def _host_semaphore(self, url):
+        """
+        Returns the semaphore limiting the downloads running at once from the host of a URL.
+        """
+        host = urlparse(url or "").netloc
+        with self.host_lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self.host_semaphores[host]
+
+    def _run(self, url, job):
+        """
+        Runs a job while holding a slot of its host.
+        """
+        with self._host_semaphore(url):
+            return job()
+
+    def submit(self, url, job):
+        """
+        Queues a download job.
+
+        Args:
+            url (str): The URL being downloaded, used for the per-host limit.
+            job (callable): Downloads the file and returns its path, or None if it failed.
+
+        Returns:
+            Future: The future of the path of the downloaded file.
+        """
+        return self.executor.submit(self._run, url, job)
@@ -0,0 +1,341 @@
+import os
+import queue
+import atexit
+import signal
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+from common import Utils, CustomLogger, LogWriter
+
+
+class DriverPool:
+    """
+    Pool of warm Chrome sessions. The driver binary is resolved once per process,
+    sessions are reused across sites and their state (windows, cookies, storage)
+    is reset between sites instead of quitting the browser.
+    Sessions started with different launch options (headless, page load strategy,
+    image loading) are kept in separate pools.
+    """
+    _pools = {}
+    _pools_lock = threading.Lock()
+    _driver_path = None
+
+    def __init__(self, headless=True, size=None, page_load_strategy=None, block_images=False):
+        """
+        Initializes the DriverPool object.
+
+        Args:
+            headless (bool): Whether the sessions of the pool run headless.
+            size (int, optional): Maximum number of sessions, read from the settings if not given.
+            page_load_strategy (str, optional): Page load strategy of the sessions.
+            block_images (bool): Whether the sessions skip loading images.
+        """
+        self.headless = headless
+        self.page_load_strategy = page_load_strategy
+        self.block_images = block_images
+        self.blocking = set()
+        self.size = size or Utils.load_settings("drivers").get("pool_size", 1)
+        self.idle = queue.LifoQueue()
+        self.sessions = set()
+        self.created = 0
+        self.condition = threading.Condition()
+        self.logger = CustomLogger()
+
+    @classmethod
+    def get(cls, headless=True, page_load_strategy=None, block_images=False):
+        """
+        Returns the pool for the given launch options, creating it on first use.
+        """
+        if page_load_strategy == "normal":
+            page_load_strategy = None
+        key = (bool(headless), page_load_strategy, bool(block_images))
+        with cls._pools_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls(key[0], page_load_strategy=key[1], block_images=key[2])
+                atexit.register(cls._pools[key].close)
+            return cls._pools[key]
+
+    @classmethod
+    def for_site(cls, config):
+        """
+        Returns the pool matching the launch options of a site configuration.
+        """
+        return cls.get(headless=config.get("headless"),
+                       page_load_strategy=config.get("page_load_strategy"),
+                       block_images=config.get("resource_blocking", {}).get("images", False))
+
+    @classmethod
+    def driver_path(cls):
+        """
+        Returns the path of the chromedriver binary, resolving it only once per process.
+        """
+        with cls._pools_lock:
+            if cls._driver_path is None:
+                cls._driver_path = ChromeDriverManager().install()
+            return cls._driver_path
+
+    def _create(self):
+        """
+        Starts a new Chrome session.
+        """
+        driver = Utils.setup_chrome_driver(headless=self.headless,
+                                           driver_path=self.driver_path(),
+                                           page_load_strategy=self.page_load_strategy,
+                                           block_images=self.block_images)
+        self.sessions.add(driver)
+        return driver
+
+    @staticmethod
+    def is_alive(driver):
+        """
+        Checks whether the browser of a session still responds.
+        """
+        try:
+            driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
+    def warm(self, count=None):
+        """
+        Starts sessions ahead of time, up to the pool size.
+
+        Args:
+            count (int, optional): Number of sessions to start, defaults to the pool size.
+        """
+        count = min(count or self.size, self.size)
+        while True:
+            with self.condition:
+                if self.created >= count:
+                    return None
+                self.created += 1
+            try:
+                self.idle.put(self._create())
+            except WebDriverException as e:
+                with self.condition:
+                    self.created -= 1
+                self.logger.log("Failed to start a Chrome session",
+                                level='ERROR',
+                                site="DriverPool",
+                                exception=e)
+                return None
+
+    def acquire(self):
+        """
+        Returns an idle session, starting a new one if the pool is not full,
+        or waits for a session to be released.
+
+        Returns:
+            WebDriver: A session ready to use.
+        """
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                driver = None
+
+            if driver is not None:
+                if self.is_alive(driver):
+                    return driver
+                self._discard(driver)
+                continue
+
+            with self.condition:
+                if self.created < self.size:
+                    self.created += 1
+                    break
+                self.condition.wait(timeout=1)
+
+        try:
+            return self._create()
+        except Exception:
+            with self.condition:
+                self.created -= 1
+                self.condition.notify()
+            raise
+
+    def block_urls(self, driver, patterns):
+        """
+        Blocks the requests of a session matching URL patterns, until the session is released.
+
+        Args:
+            driver (WebDriver): The session.
+            patterns (list): URL patterns, with "*" as wildcard.
+        """
+        if not patterns:
+            return None
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+        self.blocking.add(driver.session_id)
+        return None
+
+    @staticmethod
+    def origin(url):
+        """
+        Returns the origin of a URL ("https://example.com"), or None for pages without one.
+        """
+        parsed = urlparse(url or "")
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            return None
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def clear_storage(self, driver, origins):
+        """
+        Clears the storage (local storage, IndexedDB, cache storage, ...) of the origins a session visited.
+        A failed clear is logged and does not make the session unusable.
+        """
+        for origin in sorted(origins):
+            try:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            except WebDriverException as e:
+                self.logger.log(f"Failed to clear the storage of {origin}",
+                                level='WARNING',
+                                site="DriverPool",
+                                exception=e)
+
+    def reset(self, driver, origins=()):
+        """
+        Resets the state of a session: blocked URLs are cleared, extra windows are closed,
+        cookies are cleared, the storage of the visited origins is cleared and the
+        remaining window is left on a blank page.
+
+        Args:
+            driver (WebDriver): The session.
+            origins (iterable, optional): URLs of the site, cleared along with the origins of the open windows.
+        """
+        if driver.session_id in self.blocking:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+            self.blocking.discard(driver.session_id)
+        visited = {self.origin(url) for url in origins}
+        windows = driver.window_handles
+        for window in reversed(windows):
+            driver.switch_to.window(window)
+            visited.add(self.origin(driver.current_url))
+            if window != windows[0]:
+                driver.close()
+        driver.switch_to.window(windows[0])
+        driver.delete_all_cookies()
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        self.clear_storage(driver, visited - {None})
+        driver.get("about:blank")
+
+    def release(self, driver, origins=()):
+        """
+        Resets a session and returns it to the pool. A session which cannot be reset is quit.
+
+        Args:
+            driver (WebDriver): The session.
+            origins (iterable, optional): URLs of the site, whose storage is cleared.
+        """
+        try:
+            self.reset(driver, origins)
+        except WebDriverException as e:
+            self.logger.log("Failed to reset a Chrome session, quitting it",
+                            level='WARNING',
+                            site="DriverPool",
+                            exception=e)
+            self._discard(driver)
+            return None
+        self.idle.put(driver)
+        with self.condition:
+            self.condition.notify()
+        return None
+
+    def _discard(self, driver):
+        """
+        Quits a session and frees its slot in the pool.
+        """
+        self.sessions.discard(driver)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        with self.condition:
+            self.created -= 1
+            self.condition.notify()
+
+    @contextmanager
+    def session(self):
+        """
+        Context manager which acquires a session and releases it afterwards.
+        """
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    @classmethod
+    def quit_all(cls):
+        """
+        Quits every session of every pool, the ones in use included.
+        """
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+        for pool in pools:
+            for driver in list(pool.sessions):
+                pool._discard(driver)
+
+    def close(self):
+        """
+        Quits all idle sessions.
+        """
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                return None
+            self._discard(driver)
+
+
+def blocked_url_patterns(config):
+    """
+    Builds the URL patterns blocked for a site from the "resource_blocking" block
+    of its configuration: the enabled categories of the "blocking" settings
+    (images, fonts, media, trackers) and the patterns of the site itself.
+
+    Args:
+        config (dict): The configuration of the site.
+
+    Returns:
+        list: The URL patterns to block.
+    """
+    resource_blocking = config.get("resource_blocking", {})
+    categories = Utils.load_settings("blocking")
+    patterns = []
+    for category, category_patterns in categories.items():
+        if resource_blocking.get(category):
+            patterns.extend(category_patterns)
+    patterns.extend(pattern for pattern in resource_blocking.get("patterns", []) if pattern)
+    return patterns
+
+
+def _quit_and_exit(signum, frame):
+    """
+    Quits the Chrome sessions of a worker process which is terminated, e.g. after
+    its site timed out, so its browsers do not outlive it. The queued log entries
+    are written first, as os._exit skips the atexit flush of the log writer.
+    """
+    try:
+        CustomLogger().log("Worker process terminated, quitting its Chrome sessions",
+                           level='WARNING',
+                           site="DriverPool")
+        DriverPool.quit_all()
+    finally:
+        LogWriter.get().close()
+        os._exit(1)
+
+
+def warm_driver_pool():
+    """
+    Initializes a worker process: its Chrome sessions are quit when it is terminated,
+    and its headless sessions are started ahead of its first site, if enabled in the
+    "drivers" section of the settings.
+    """
+    signal.signal(signal.SIGTERM, _quit_and_exit)
+    if Utils.load_settings("drivers").get("warm", True):
+        DriverPool.get(headless=True).warm()
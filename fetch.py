@@ -0,0 +1,199 @@
+import os
+import re
+import asyncio
+import threading
+import importlib.util
+from urllib.parse import urlparse
+
+import httpx
+
+from common import Utils, CustomLogger
+from http_cache import HttpCache
+
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9,bg;q=0.8',
+}
+
+
+def absolute_url(url_site, url):
+    """
+    Builds an absolute URL from a link found on a site, the same way
+    RequestsHandling.handle_missing_schema does.
+
+    Args:
+        url_site (str): The base URL of the site.
+        url (str): The link to resolve.
+
+    Returns:
+        str: The absolute URL.
+    """
+    if not url or re.match(r"^https?://", url):
+        return url
+    if url.startswith("//"):
+        return "https:" + url
+    match = re.match(r"(https?://[^/]+)", url_site)
+    domain = match.group(1) if match else ""
+    if url.startswith("/"):
+        return domain + url
+    return domain + "/" + url
+
+
+class AsyncFetcher:
+    """
+    Asyncio based fetch layer sharing one connection-pooled HTTP client per process.
+    Connections are kept alive per host and HTTP/2 is used when the h2 package is installed.
+    The coroutines run on a background event loop, so the fetcher can be used from
+    the synchronous scrape methods and from several threads at once.
+    With the HTTP cache enabled, requests are conditional and 304 responses are
+    answered with the cached body.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_connections=None, per_host_limit=None, timeout=None):
+        """
+        Initializes the AsyncFetcher object. Arguments which are not given are read
+        from the "http" section of the settings.
+
+        Args:
+            max_connections (int, optional): Maximum number of requests in flight.
+            per_host_limit (int, optional): Maximum number of requests in flight per host.
+            timeout (int, optional): Request timeout in seconds.
+        """
+        settings = Utils.load_settings("http")
+        self.max_connections = max_connections or settings.get("max_connections", 100)
+        self.per_host_limit = per_host_limit or settings.get("per_host_limit", 8)
+        self.timeout = timeout or settings.get("timeout", 30)
+        self.http2 = settings.get("http2", True) and importlib.util.find_spec("h2") is not None
+        self.logger = CustomLogger()
+        self.pid = os.getpid()
+        self.cache = HttpCache.shared()
+        self.host_semaphores = {}
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="AsyncFetcher", daemon=True)
+        self.thread.start()
+        self._run(self._setup())
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the fetcher shared by the whole process. A forked process gets its own
+        fetcher, as the event loop thread does not survive a fork.
+        """
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.pid != os.getpid():
+                cls._shared = cls()
+            return cls._shared
+
+    async def _setup(self):
+        """
+        Creates the client and the global semaphore on the event loop.
+        """
+        self.semaphore = asyncio.Semaphore(self.max_connections)
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            http2=self.http2,
+            follow_redirects=True,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections))
+
+    def _run(self, coroutine):
+        """
+        Runs a coroutine on the event loop and waits for its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def _host_semaphore(self, url):
+        """
+        Returns the semaphore limiting the requests in flight to the host of a URL.
+        Only called on the event loop, so no lock is needed.
+        """
+        host = urlparse(url).netloc
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self.host_semaphores[host]
+
+    async def get(self, url, headers=None, site=None):
+        """
+        Fetches a URL.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (dict, optional): Extra request headers.
+            site (str, optional): The name of the site, used for logging.
+
+        Returns:
+            Response: The response, or None if the request failed.
+        """
+        entry = self.cache.lookup(url) if self.cache is not None else None
+        if entry:
+            headers = {**(headers or {}), **HttpCache.conditional_headers(entry)}
+        async with self.semaphore, self._host_semaphore(url):
+            try:
+                response = await self.client.get(url, headers=headers)
+            except httpx.HTTPError as e:
+                self.logger.log(f"Request to {url} failed",
+                                level='ERROR',
+                                site=site,
+                                exception=e)
+                return None
+        if self.cache is None:
+            return response
+        return self._through_cache(url, entry, response)
+
+    def _through_cache(self, url, entry, response):
+        """
+        Answers a 304 response with the cached body and stores the body of a 200 response.
+
+        Returns:
+            Response: The response, rebuilt with status 200 from the cache on a 304.
+        """
+        if response.status_code == 304 and entry:
+            body = self.cache.body(url)
+            if body is not None:
+                validators = {name: value for name, value in (("ETag", entry["etag"]),
+                                                             ("Last-Modified", entry["last_modified"])) if value}
+                return httpx.Response(200, headers=validators, content=body, request=response.request)
+        elif response.status_code == 200:
+            self.cache.store(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), response.content)
+        return response
+
+    def fetch(self, url, headers=None, site=None):
+        """
+        Fetches a URL from synchronous code.
+
+        Returns:
+            Response: The response, or None if the request failed.
+        """
+        return self._run(self.get(url, headers=headers, site=site))
+
+    def fetch_many(self, urls, headers=None, site=None):
+        """
+        Fetches several URLs concurrently from synchronous code.
+
+        Args:
+            urls (list): The URLs to fetch.
+            headers (dict, optional): Extra request headers.
+            site (str, optional): The name of the site, used for logging.
+
+        Returns:
+            list: The responses in the order of the URLs, None for failed requests.
+        """
+        async def gather():
+            return await asyncio.gather(*(self.get(url, headers=headers, site=site) for url in urls))
+
+        if not urls:
+            return []
+        return self._run(gather())
+
+    def close(self):
+        """
+        Closes the client and stops the event loop.
+        """
+        self._run(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,153 @@
+import os
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+from common import Paths, Utils
+
+
+def body_hash(content):
+    """
+    Returns the SHA-256 hex digest of a response body.
+    """
+    return hashlib.sha256(content or b'').hexdigest()
+
+
+class HttpCache:
+    """
+    On-disk cache of the listing and detail pages fetched over HTTP. For each URL
+    the ETag and Last-Modified validators of the last response are kept with its
+    compressed body, so the next request is conditional and a 304 is answered from
+    the cache. The hash of the listing body at the last completed run of a site is
+    kept too: a listing which is unchanged since then has nothing new to scrape.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body_hash TEXT,
+            body BLOB,
+            completed_hash TEXT,
+            updated_at TEXT
+        );
+    """
+
+    def __init__(self, db_path=None, short_circuit=None):
+        """
+        Initializes the HttpCache object. Arguments which are not given
+        are read from the "http_cache" section of the settings.
+
+        Args:
+            db_path (str, optional): Path to the cache database.
+            short_circuit (bool, optional): Skip a site whose listing is unchanged since its last completed run.
+        """
+        settings = Utils.load_settings("http_cache")
+        self.db_path = db_path or os.path.join(Paths().data_dir, "http_cache.db")
+        self.short_circuit = settings.get("short_circuit", True) if short_circuit is None else short_circuit
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the cache shared by the whole process, or None if it is disabled in the settings.
+        A forked process opens its own connection.
+        """
+        if not Utils.load_settings("http_cache").get("enabled", True):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.pid != os.getpid():
+                cls._shared = cls()
+            return cls._shared
+
+    def lookup(self, url):
+        """
+        Returns the validators of a URL.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            dict: The ETag and Last-Modified of the last response, or None if the URL has no cached body.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified FROM pages WHERE url = ? AND body IS NOT NULL", (url,)).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1]}
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Returns the conditional request headers for a cache entry.
+        """
+        headers = {}
+        if entry and entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+
+    def body(self, url):
+        """
+        Returns the cached body of a URL, or None if it is not cached.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT body FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return zlib.decompress(row[0])
+
+    def store(self, url, etag, last_modified, content):
+        """
+        Records the validators and body of a response. The body is only rewritten when it changed.
+
+        Args:
+            url (str): The URL of the page.
+            etag (str): ETag of the response.
+            last_modified (str): Last-Modified of the response.
+            content (bytes): The body of the response.
+        """
+        digest = body_hash(content)
+        with self.lock:
+            row = self.connection.execute("SELECT body_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            with self.connection:
+                if row is not None and row[0] == digest:
+                    self.connection.execute(
+                        "UPDATE pages SET etag = ?, last_modified = ?, updated_at = ? WHERE url = ?",
+                        (etag, last_modified, Utils.get_current_datetime(), url))
+                else:
+                    self.connection.execute(
+                        "INSERT INTO pages (url, etag, last_modified, body_hash, body, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                        "body_hash = excluded.body_hash, body = excluded.body, updated_at = excluded.updated_at",
+                        (url, etag, last_modified, digest, zlib.compress(content), Utils.get_current_datetime()))
+
+    def is_unchanged(self, url, content):
+        """
+        Checks whether a listing page has the same body as at the last completed run of its site.
+        Always False when short_circuit is disabled.
+        """
+        if not self.short_circuit:
+            return False
+        with self.lock:
+            row = self.connection.execute("SELECT completed_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] == body_hash(content)
+
+    def complete(self, url, content):
+        """
+        Records the body of a listing page at the end of a completed run of its site.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE pages SET completed_hash = ? WHERE url = ?", (body_hash(content), url))
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from common import Utils
+from dedup import canonical_href
+from dates import DATE_OUTPUT_FORMAT
+
+
+def incremental_enabled(config):
+    """
+    Checks whether incremental crawling is enabled for a site: the "incremental" key
+    of its configuration, or the "incremental" setting of the "runner" section.
+    """
+    if "incremental" in config:
+        return bool(config.get("incremental"))
+    return bool(Utils.load_settings("runner").get("incremental", False))
+
+
+def parse_row_date(date):
+    """
+    Parses a normalized date ("Jan 08, 2020").
+
+    Returns:
+        datetime: The date, or None if it is missing or in another format.
+    """
+    if not date or date == '-':
+        return None
+    try:
+        return datetime.strptime(date, DATE_OUTPUT_FORMAT)
+    except ValueError:
+        return None
+
+
+class IncrementalCrawl:
+    """
+    Walks the listing of a site from the newest item down to its high-water mark:
+    the newest link and date recorded at the last run which scraped every new item.
+    The walk stops at the mark, so steady-state runs only extract and fetch the new
+    items. Other known items are skipped without stopping, so items below them which
+    failed or were not reached at an earlier run are still scraped.
+    """
+
+    def __init__(self, catalog, site_name, config):
+        """
+        Initializes the IncrementalCrawl object.
+
+        Args:
+            catalog (ScrapeCatalog): The scrape catalog.
+            site_name (str): Name of the site.
+            config (dict): The configuration of the site.
+        """
+        self.catalog = catalog
+        self.site_name = site_name
+        self.enabled = incremental_enabled(config)
+        mark = catalog.watermark(site_name) if self.enabled else None
+        self.href_key = mark["href_key"] if mark else None
+        self.date = parse_row_date(mark["date"]) if mark else None
+        self.reached = False
+
+    @property
+    def needs_date(self):
+        """
+        Whether the listing dates are compared with the mark.
+        """
+        return self.enabled and self.date is not None
+
+    def is_known(self, dedup, href, title=None, date=None):
+        """
+        Checks whether a listing item is already known. Items of the join page are
+        matched by title; other items by the link or date of the mark, then by link.
+        The walk is over only at the mark: its link or a date older than it.
+
+        Args:
+            dedup (DedupIndex): The dedup index of the site.
+            href (str): The link of the item.
+            title (str, optional): The title of the item.
+            date (str, optional): The normalized date of the item ("Jan 08, 2020").
+
+        Returns:
+            bool: True if the item is known.
+        """
+        if href and href.endswith(".com/join"):
+            return dedup.has_title(title)
+        if self.enabled:
+            item_date = parse_row_date(date) if self.date is not None else None
+            if ((self.href_key is not None and canonical_href(href) == self.href_key)
+                    or (item_date is not None and item_date < self.date)):
+                self.reached = True
+                return True
+        return dedup.has_href(href)
+
+    def update(self, rows):
+        """
+        Moves the high-water mark to the newest scraped row. Rows are in listing order,
+        so the first row with a link is the newest. Only called after a run in which
+        every new item was scraped, so no item below the mark is missing.
+
+        Args:
+            rows (list): The scraped rows of the run.
+        """
+        hrefs = [row[7] for row in rows if row[7] != '-' and not row[7].endswith(".com/join")]
+        if not hrefs:
+            return None
+        dates = [date for date in (parse_row_date(row[1]) for row in rows) if date is not None]
+        newest_date = max(dates).strftime(DATE_OUTPUT_FORMAT) if dates else None
+        self.catalog.set_watermark(self.site_name, hrefs[0], newest_date)
+        return None
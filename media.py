@@ -0,0 +1,136 @@
+import os
+import threading
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image
+
+from common import Utils
+
+
+IMAGE_EXTENSIONS = {
+    "jpeg": "jpg",
+    "webp": "webp",
+    "avif": "avif",
+}
+
+
+def transcode_image(data, path_image, max_width=None, max_height=None, image_format="jpeg", quality=50):
+    """
+    Decodes an image, downscales it to the maximum dimensions and saves it in the given format.
+    Defined at module level, so it can run in a worker process.
+
+    JPEG sources are decoded with draft(), which lets the decoder skip most of the
+    work of a large poster when it is going to be downscaled anyway.
+
+    Args:
+        data (bytes): The downloaded image.
+        path_image (str): Path of the output file.
+        max_width (int, optional): Maximum width of the output.
+        max_height (int, optional): Maximum height of the output.
+        image_format (str): Output format: jpeg, webp or avif.
+        quality (int): Output quality.
+
+    Returns:
+        str: Path of the saved image.
+    """
+    if image_format == "avif":
+        try:
+            import pillow_avif  # noqa: F401  Registers the AVIF plugin on Pillow versions without native support.
+        except ImportError:
+            pass
+
+    image = Image.open(BytesIO(data))
+    if max_width or max_height:
+        size = (max_width or image.width, max_height or image.height)
+        if image.format == "JPEG":
+            image.draft("RGB", size)
+        image = image.convert("RGB")
+        image.thumbnail(size)
+    else:
+        image = image.convert("RGB")
+
+    if image_format == "jpeg":
+        image.save(path_image, "JPEG", optimize=True, quality=quality)
+    elif image_format == "webp":
+        image.save(path_image, "WEBP", quality=quality, method=4)
+    else:
+        image.save(path_image, image_format.upper(), quality=quality)
+    return path_image
+
+
+class ImageProcessor:
+    """
+    Process pool for image transcoding, so decoding and encoding posters does not
+    hold the GIL of the scraping threads. One processor is shared per process.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers=None, max_width=None, max_height=None, image_format=None, quality=None):
+        """
+        Initializes the ImageProcessor object. Arguments which are not given
+        are read from the "images" section of the settings.
+
+        Args:
+            workers (int, optional): Number of worker processes.
+            max_width (int, optional): Maximum width of the saved images.
+            max_height (int, optional): Maximum height of the saved images.
+            image_format (str, optional): Output format: jpeg, webp or avif.
+            quality (int, optional): Output quality.
+        """
+        settings = Utils.load_settings("images")
+        self.workers = workers or settings.get("workers", 2)
+        self.max_width = max_width or settings.get("max_width")
+        self.max_height = max_height or settings.get("max_height")
+        self.image_format = (image_format or settings.get("format", "jpeg")).lower()
+        self.quality = quality or settings.get("quality", 50)
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        self.pid = os.getpid()
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the processor shared by the whole process. A forked process gets its own
+        processor, as the futures of an inherited process pool are never resolved.
+        """
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.pid != os.getpid():
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def variant(self):
+        """
+        Returns the transcoding parameters which change the output besides its format,
+        so cached images transcoded with other sizes or quality are not reused.
+        """
+        return f"{self.max_width or 0}x{self.max_height or 0}q{self.quality}"
+
+    @property
+    def extension(self):
+        """
+        Returns the file extension of the output format.
+        """
+        return IMAGE_EXTENSIONS.get(self.image_format, self.image_format)
+
+    def submit(self, data, path_image):
+        """
+        Queues an image for transcoding.
+
+        Args:
+            data (bytes): The downloaded image.
+            path_image (str): Path of the output file.
+
+        Returns:
+            Future: The future of the path of the saved image.
+        """
+        args = (transcode_image, data, path_image, self.max_width, self.max_height, self.image_format, self.quality)
+        try:
+            return self.executor.submit(*args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed while decoding): start a new pool and try once more.
+            with self._shared_lock:
+                self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor.submit(*args)
@@ -0,0 +1,199 @@
+import os
+import shutil
+import sqlite3
+import hashlib
+import threading
+
+from common import Paths, Utils, CustomLogger
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Returns the SHA-256 hex digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCache:
+    """
+    Content-addressed store of downloaded images and trailers.
+    Two indexes are kept in SQLite: URL to content hash (with the ETag and
+    Last-Modified validators of the last response), and content hash to blob.
+    Blobs are hard links in the media store, so a file scraped again under the
+    same URL, or the same content under another URL, is linked instead of
+    downloaded and stored twice.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS urls (
+            url TEXT PRIMARY KEY,
+            blob_key TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            updated_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS blobs (
+            blob_key TEXT PRIMARY KEY,
+            size INTEGER,
+            created_at TEXT
+        );
+    """
+
+    def __init__(self, db_path=None, store_dir=None, revalidate=None):
+        """
+        Initializes the MediaCache object. Arguments which are not given
+        are read from the "media_cache" section of the settings.
+
+        Args:
+            db_path (str, optional): Path to the index database.
+            store_dir (str, optional): Directory of the blobs.
+            revalidate (bool, optional): Send a conditional request on a cache hit
+                                         instead of skipping the download.
+        """
+        settings = Utils.load_settings("media_cache")
+        self.db_path = db_path or os.path.join(Paths().data_dir, "media_cache.db")
+        self.store_dir = store_dir or Paths().media_store_dir
+        self.revalidate = settings.get("revalidate", False) if revalidate is None else revalidate
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+        self.lock = threading.Lock()
+        self.logger = CustomLogger()
+        self.pid = os.getpid()
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the cache shared by the whole process, or None if it is disabled in the settings.
+        A forked process opens its own connection.
+        """
+        if not Utils.load_settings("media_cache").get("enabled", True):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.pid != os.getpid():
+                cls._shared = cls()
+            return cls._shared
+
+    def blob_path(self, blob_key):
+        """
+        Returns the path of a blob in the media store.
+        """
+        return os.path.join(self.store_dir, blob_key[:2], blob_key)
+
+    @staticmethod
+    def blob_key(digest, extension, variant=None):
+        """
+        Returns the key of a blob: the hash of the downloaded content, the variant of the
+        transcoding which produced the blob (sizes and quality), if any, and the file extension.
+        """
+        return f"{digest}.{variant}.{extension}" if variant else f"{digest}.{extension}"
+
+    def lookup(self, url, extension=None, variant=None):
+        """
+        Returns the cache entry of a URL.
+
+        Args:
+            url (str): The URL of the file.
+            extension (str, optional): Only return a blob with this file extension.
+            variant (str, optional): Only return a blob of this transcoding variant.
+
+        Returns:
+            dict: The blob path and validators of the URL, or None if the URL or its blob is unknown.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT blob_key, etag, last_modified FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        blob_key, etag, last_modified = row
+        if extension and not blob_key.endswith(f".{variant}.{extension}" if variant else f".{extension}"):
+            return None
+        path = self.blob_path(blob_key)
+        if not os.path.exists(path):
+            return None
+        return {"blob_key": blob_key, "path": path, "etag": etag, "last_modified": last_modified}
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Returns the conditional request headers for a cache entry.
+        """
+        headers = {}
+        if entry and entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+
+    def find_blob(self, digest, extension, variant=None):
+        """
+        Returns the path of the blob with the given content, or None if it is not stored.
+        """
+        path = self.blob_path(self.blob_key(digest, extension, variant))
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def link(blob_path, target_path):
+        """
+        Makes the target path refer to a blob, with a hard link where the file system
+        supports it and a copy otherwise.
+
+        Returns:
+            str: The target path.
+        """
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        try:
+            os.link(blob_path, target_path)
+        except OSError:
+            shutil.copy2(blob_path, target_path)
+        return target_path
+
+    def remember(self, url, blob_key, etag=None, last_modified=None):
+        """
+        Records the blob and validators of a URL.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO urls (url, blob_key, etag, last_modified, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (url, blob_key, etag, last_modified, Utils.get_current_datetime()))
+
+    def adopt(self, path, url, digest, extension, etag=None, last_modified=None, variant=None):
+        """
+        Adds a freshly downloaded file to the store. If the same content is already
+        stored, the file is replaced by a link to the existing blob.
+
+        Args:
+            path (str): Path of the downloaded file.
+            url (str): The URL of the file.
+            digest (str): Content hash identifying the blob.
+            extension (str): File extension of the blob.
+            etag (str, optional): ETag of the response.
+            last_modified (str, optional): Last-Modified of the response.
+            variant (str, optional): Transcoding variant of the file, for transcoded images.
+
+        Returns:
+            str: The path of the file.
+        """
+        blob_key = self.blob_key(digest, extension, variant)
+        blob_path = self.blob_path(blob_key)
+        if os.path.exists(blob_path):
+            self.link(blob_path, path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            try:
+                os.link(path, blob_path)
+            except OSError:
+                shutil.copy2(path, blob_path)
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO blobs (blob_key, size, created_at) VALUES (?, ?, ?)",
+                    (blob_key, os.path.getsize(path), Utils.get_current_datetime()))
+        self.remember(url, blob_key, etag, last_modified)
+        return path
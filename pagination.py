@@ -0,0 +1,177 @@
+from collections import deque
+
+from selenium.webdriver.common.by import By
+
+from fetch import absolute_url
+
+
+# Scrolls to the bottom of the page, where infinite scroll listings load their next items.
+SCROLL_SCRIPT = "window.scrollTo(0, document.body.scrollHeight);"
+
+# Counts the nodes matching an XPath without transferring them.
+COUNT_SCRIPT = """
+return document.evaluate('count(' + arguments[0] + ')', document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+"""
+
+
+class ListingPages:
+    """
+    The listing pages of a site after the first one, from the "pagination" block of
+    its configuration. Pages are found by one of:
+        url_template (str): URL of a page with a {page} placeholder, numbered from start_page.
+        next_page_xpath (str): XPath of the link to the next page, or of its href attribute.
+        infinite_scroll (bool): More items load when scrolling to the bottom (Selenium only).
+    At most max_pages pages (or scrolls) are visited in a run. The walk goes on while each
+    page has new items and, in incremental mode, the high-water mark was not reached, so a
+    run after downtime catches up and a steady-state run stops after page 1.
+    """
+
+    def __init__(self, config, crawl):
+        """
+        Initializes the ListingPages object.
+
+        Args:
+            config (dict): The configuration of the site.
+            crawl (IncrementalCrawl): The incremental crawl of the run.
+        """
+        pagination = config.get("pagination", {})
+        self.url_template = pagination.get("url_template") or None
+        self.next_page_xpath = pagination.get("next_page_xpath") or None
+        self.infinite_scroll = bool(pagination.get("infinite_scroll"))
+        self.start_page = int(pagination.get("start_page") or 2)
+        self.max_pages = max(1, int(pagination.get("max_pages") or 5))
+        self.prefetch = max(1, int(pagination.get("prefetch") or 4))
+        self.crawl = crawl
+        self.pages = 1
+        self.prefetched = deque()
+
+    @property
+    def scrolling(self):
+        """
+        Whether the listing is paginated by scrolling.
+        """
+        return self.infinite_scroll and not self.url_template and not self.next_page_xpath
+
+    def should_continue(self, found_items, new_items):
+        """
+        Checks whether the walk goes on to the next page.
+
+        Args:
+            found_items (int): Number of items found on the current page.
+            new_items (int): Number of new items on the current page.
+
+        Returns:
+            bool: True if the next page should be visited.
+        """
+        if not (self.url_template or self.next_page_xpath or self.infinite_scroll):
+            return False
+        if self.pages >= self.max_pages or not found_items:
+            return False
+        if self.crawl.reached:
+            return False
+        return new_items > 0
+
+    def template_url(self, number):
+        """
+        Returns the URL of a page of the URL template.
+        """
+        return self.url_template.format(page=number)
+
+    def next_link(self, scrape, page_url):
+        """
+        Finds the link to the next listing page.
+
+        Args:
+            scrape (SiteScraper): The scraper of the site, on the current listing page.
+            page_url (str): The URL of the current listing page.
+
+        Returns:
+            str: The absolute URL of the next page, or None if there is none.
+        """
+        if getattr(scrape, "driver", None) is not None:
+            links = scrape.driver.find_elements(By.XPATH, self.next_page_xpath)
+            href = links[0].get_attribute("href") if links else None
+        else:
+            links = scrape.xpaths.xpath(scrape.tree, self.next_page_xpath)
+            href = (links[0] if isinstance(links[0], str) else links[0].get("href")) if links else None
+        if not href or href.startswith(("#", "javascript:")):
+            return None
+        next_url = absolute_url(page_url, href.strip())
+        return next_url if next_url != page_url else None
+
+    def fetch_next(self, fetcher, scrape, page_url, headers=None, site=None):
+        """
+        Fetches the next listing page for the lxml path. With a URL template the next
+        pages are known in advance, so up to prefetch of them are fetched concurrently
+        and handed out in order; with a next page link each page is fetched on its own.
+
+        Args:
+            fetcher (AsyncFetcher): The HTTP fetcher.
+            scrape (SiteScraper): The scraper of the site, on the current listing page.
+            page_url (str): The URL of the current listing page.
+            headers (dict, optional): Extra request headers.
+            site (str, optional): Name of the site, for logging.
+
+        Returns:
+            tuple: The URL and the response of the next page, or (None, None).
+        """
+        if self.url_template:
+            if not self.prefetched:
+                first = self.start_page + self.pages - 1
+                urls = [self.template_url(first + index)
+                        for index in range(min(self.prefetch, self.max_pages - self.pages))]
+                self.prefetched.extend(zip(urls, fetcher.fetch_many(urls, headers=headers, site=site)))
+            url, response = self.prefetched.popleft()
+        elif self.next_page_xpath:
+            url = self.next_link(scrape, page_url)
+            if url is None:
+                return None, None
+            response = fetcher.fetch(url, headers=headers, site=site)
+        else:
+            return None, None
+        self.pages += 1
+        if response is None or response.status_code != 200:
+            return None, None
+        return url, response
+
+    def open_next(self, scrape, page_url):
+        """
+        Opens the next listing page in the browser, from the URL template or the next page link.
+
+        Returns:
+            str: The URL of the page, or None if there is none.
+        """
+        if self.url_template:
+            url = self.template_url(self.start_page + self.pages - 1)
+        else:
+            url = self.next_link(scrape, page_url)
+        if url is None:
+            return None
+        self.pages += 1
+        scrape.driver.get(url)
+        return url
+
+    def scroll(self, scrape):
+        """
+        Scrolls to the bottom of the listing and waits until more items are in the DOM,
+        then until the DOM is stable, instead of sleeping for a fixed time.
+
+        Args:
+            scrape (SiteScraper): The scraper of the site, on the listing page.
+
+        Returns:
+            bool: True if more items were loaded.
+        """
+        driver = scrape.driver
+        counted = [(xpath, driver.execute_script(COUNT_SCRIPT, xpath))
+                   for xpath in scrape.home_xpaths("element") if xpath]
+        counted = [(xpath, count) for xpath, count in counted if count]
+        if not counted:
+            return False
+        xpath, before = counted[0]
+        self.pages += 1
+        driver.execute_script(SCROLL_SCRIPT)
+        grown = scrape.waits.settle("scroll", lambda driver: driver.execute_script(COUNT_SCRIPT, xpath) > before, 5)
+        if grown:
+            scrape.waits.dom_stable()
+        return grown
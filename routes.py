@@ -0,0 +1,127 @@
+import os
+import json
+import sqlite3
+import threading
+
+from common import Paths, Utils, ConfigRegistry
+
+
+class RouteStore:
+    """
+    SQLite store of the scrape method detected for each site. A site configured
+    with method_selenium whose listing page can be scraped from the plain HTML
+    (with the cookies set by its enter button) is routed to method_lxml.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS routes (
+            site TEXT PRIMARY KEY,
+            method TEXT NOT NULL,
+            cookies TEXT,
+            selenium_count INTEGER,
+            lxml_count INTEGER,
+            checked_at TEXT
+        );
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Opens the route database in WAL mode and creates the table if needed.
+
+        Args:
+            db_path (str, optional): Path to the database file.
+        """
+        self.db_path = db_path or os.path.join(Paths().data_dir, "routes.db")
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+        self.lock = threading.Lock()
+
+    def get(self, site_name):
+        """
+        Returns the detected route of a site.
+
+        Args:
+            site_name (str): The name of the site.
+
+        Returns:
+            dict: The method and cookies of the site, or None if it was not checked yet.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT method, cookies FROM routes WHERE site = ?", (site_name,)).fetchone()
+        if row is None:
+            return None
+        return {"method": row[0], "cookies": json.loads(row[1] or "{}")}
+
+    def set(self, site_name, method, cookies=None, selenium_count=None, lxml_count=None):
+        """
+        Records the detected route of a site.
+
+        Args:
+            site_name (str): The name of the site.
+            method (str): The scrape method to use for the site.
+            cookies (dict, optional): Cookies to send with the plain HTTP requests.
+            selenium_count (int, optional): Number of elements found by Selenium.
+            lxml_count (int, optional): Number of elements found in the plain HTML.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO routes (site, method, cookies, selenium_count, lxml_count, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (site_name, method, json.dumps(cookies or {}), selenium_count, lxml_count,
+                 Utils.get_current_datetime()))
+
+    def clear(self, site_name):
+        """
+        Removes the route of a site, so it is checked again on its next Selenium run.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM routes WHERE site = ?", (site_name,))
+
+
+def auto_route_enabled(config):
+    """
+    Checks whether route detection is enabled for a site: the "auto_route" key of
+    its configuration, or the "auto_route" setting of the "runner" section.
+    """
+    if "auto_route" in config:
+        return bool(config.get("auto_route"))
+    return bool(Utils.load_settings("runner").get("auto_route", False))
+
+
+def cookie_header(cookies):
+    """
+    Builds the Cookie request header from a dict of cookies.
+
+    Returns:
+        dict: The header, or None if there are no cookies.
+    """
+    if not cookies:
+        return None
+    return {"Cookie": "; ".join(f"{name}={value}" for name, value in cookies.items())}
+
+
+def apply_route(site, store=None):
+    """
+    Applies the detected route of a site to its configuration in this process:
+    a site routed to method_lxml gets that scrape method and the cookies to replay.
+
+    Args:
+        site (str): The name of the site.
+        store (RouteStore, optional): The route store, a new one if not given.
+
+    Returns:
+        str: The scrape method to use for the site.
+    """
+    ConfigRegistry.override(site)
+    config = Utils.load_configs(site)
+    if config.get("scrape_method") != "method_selenium" or not auto_route_enabled(config):
+        return config.get("scrape_method")
+
+    site_name = Utils.extract_site_name(config.get("site"))
+    route = (store or RouteStore()).get(site_name)
+    if route and route["method"] == "method_lxml":
+        ConfigRegistry.override(site, scrape_method="method_lxml", route_cookies=route["cookies"], routed=True)
+        return "method_lxml"
+    return "method_selenium"
@@ -0,0 +1,260 @@
+import os
+import time
+import queue
+import signal
+import threading
+import multiprocessing
+import concurrent.futures
+import concurrent.futures.process
+from urllib.parse import urlparse
+
+from common import Utils, CustomLogger
+from scrapemethods import Methods
+from drivers import warm_driver_pool
+from routes import RouteStore, apply_route
+
+
+def run_site(site, timeout=None):
+    """
+    Runs the scrape method of a site: the configured one, or method_lxml if the
+    site was detected to work without a browser.
+    Defined at module level, so it can be sent to a worker process.
+
+    Args:
+        site (str): The name of the site to be scraped.
+        timeout (int, optional): Seconds after which the scrape method stops, counted from now.
+
+    Returns:
+        str: The name of the scraped site.
+    """
+    method_name = apply_route(site)
+    site_processor = Methods(deadline=time.monotonic() + timeout if timeout else None)
+    method_to_call = getattr(site_processor, method_name)
+    method_to_call(site)
+    return site
+
+
+def init_selenium_worker(worker_pid):
+    """
+    Initializes a Selenium worker process: reports its pid to the runner, which
+    terminates it when its site times out, and warms its driver pool.
+
+    Args:
+        worker_pid (Value): Shared integer the pid is written to.
+    """
+    worker_pid.value = os.getpid()
+    warm_driver_pool()
+
+
+class SiteRunner:
+    """
+    Runs sites concurrently. Sites scraped with method_lxml run in a thread pool,
+    sites scraped with method_selenium run in a separate, smaller process pool.
+    The number of sites running at once against the same domain is limited.
+    Every site has a timeout, counted from the moment it starts running: a
+    method_lxml site stops itself at its deadline, and the worker process of a
+    method_selenium site is terminated, with its browser, and replaced.
+    """
+
+    def __init__(self, lxml_workers=None, selenium_workers=None, per_domain_limit=None, site_timeout=None):
+        """
+        Initializes the SiteRunner object. Arguments which are not given are read
+        from the "runner" section of the settings.
+
+        Args:
+            lxml_workers (int, optional): Number of threads for method_lxml sites.
+            selenium_workers (int, optional): Number of processes for method_selenium sites.
+            per_domain_limit (int, optional): Maximum number of sites running at once per domain.
+            site_timeout (int, optional): Seconds after which a site is reported as timed out.
+        """
+        settings = Utils.load_settings("runner")
+        self.lxml_workers = lxml_workers or settings.get("lxml_workers", 16)
+        self.selenium_workers = selenium_workers or settings.get("selenium_workers", 2)
+        self.per_domain_limit = per_domain_limit or settings.get("per_domain_limit", 1)
+        self.site_timeout = site_timeout or settings.get("site_timeout", 1800)
+        self.timeout_grace = settings.get("timeout_grace", 60)
+        self.logger = CustomLogger()
+        self.routes = RouteStore()
+
+        self.domain_semaphores = {}
+        self.domain_lock = threading.Lock()
+
+        self.lxml_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.lxml_workers)
+        # One single-process pool per Selenium slot, so a timed out site can be terminated alone.
+        self.selenium_pools = queue.Queue()
+        for _ in range(self.selenium_workers):
+            self.selenium_pools.put(self._new_selenium_pool())
+        # Dispatch threads hold the domain slots and wait for the workers with a timeout.
+        self.lxml_dispatch = concurrent.futures.ThreadPoolExecutor(max_workers=self.lxml_workers)
+        self.selenium_dispatch = concurrent.futures.ThreadPoolExecutor(max_workers=self.selenium_workers)
+
+    @staticmethod
+    def get_domain(site):
+        """
+        Returns the domain of a site, without "www.".
+        """
+        netloc = urlparse(Utils.load_configs(site).get("site") or "").netloc.lower()
+        return netloc[4:] if netloc.startswith("www.") else netloc
+
+    def _domain_semaphore(self, site):
+        """
+        Returns the semaphore limiting the sites running at once against the domain of a site.
+        """
+        domain = self.get_domain(site)
+        with self.domain_lock:
+            if domain not in self.domain_semaphores:
+                self.domain_semaphores[domain] = threading.BoundedSemaphore(self.per_domain_limit)
+            return self.domain_semaphores[domain]
+
+    @staticmethod
+    def _new_selenium_pool():
+        """
+        Creates the worker process pool of a Selenium slot. Workers are spawned, not forked:
+        a fork would inherit the shared fetcher, pipelines and pools of the lxml threads
+        without the threads and processes behind them.
+
+        Returns:
+            tuple: The pool and the shared value its worker reports its pid to.
+        """
+        context = multiprocessing.get_context("spawn")
+        worker_pid = context.Value("i", 0)
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=context, initializer=init_selenium_worker, initargs=(worker_pid,))
+        return pool, worker_pid
+
+    @staticmethod
+    def _terminate_selenium_pool(pool, worker_pid, future):
+        """
+        Terminates the worker process of a Selenium slot. The worker quits its
+        Chrome sessions on SIGTERM and is killed if it does not exit in time.
+
+        Args:
+            pool (ProcessPoolExecutor): The pool of the slot.
+            worker_pid (Value): The pid reported by the worker.
+            future (Future): The job of the timed out site, done once the worker is gone.
+        """
+        pid = worker_pid.value
+        for signum in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+            if not pid or future.done():
+                break
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                break
+            concurrent.futures.wait([future], timeout=10)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _wait_until_started(future):
+        """
+        Waits until a job leaves the queue of its pool, so its timeout only counts its own run.
+        """
+        while not future.running() and not future.done():
+            concurrent.futures.wait([future], timeout=1)
+
+    def _dispatch(self, site, method_name):
+        """
+        Runs a site in the worker pool of its scrape method while holding its domain slot.
+
+        Args:
+            site (str): The name of the site to be scraped.
+            method_name (str): The scrape method of the site.
+
+        Returns:
+            str: The name of the scraped site, or None if it timed out.
+        """
+        with self._domain_semaphore(site):
+            if method_name == "method_selenium":
+                return self._dispatch_selenium(site)
+            future = self.lxml_pool.submit(run_site, site, self.site_timeout)
+            self._wait_until_started(future)
+            try:
+                return future.result(timeout=self.site_timeout)
+            except concurrent.futures.TimeoutError:
+                self.logger.log(f"{site} did not finish in {self.site_timeout} seconds, waiting for it to stop",
+                                level='CRITICAL',
+                                site=site)
+            # The site checks its deadline and stops; its domain slot is held until then,
+            # but not forever: a site stuck in a call which does not check the deadline is given up.
+            try:
+                future.result(timeout=self.timeout_grace)
+            except concurrent.futures.TimeoutError:
+                self.logger.log(f"{site} did not stop {self.timeout_grace} seconds after its timeout, giving up on it",
+                                level='CRITICAL',
+                                site=site)
+            return None
+
+    def _dispatch_selenium(self, site):
+        """
+        Runs a Selenium site in the process pool of a free Selenium slot. The worker
+        process is terminated when the site times out, and replaced when it died.
+
+        Args:
+            site (str): The name of the site to be scraped.
+
+        Returns:
+            str: The name of the scraped site, or None if it timed out.
+        """
+        pool, worker_pid = self.selenium_pools.get()
+        try:
+            future = pool.submit(run_site, site)
+            self._wait_until_started(future)
+            try:
+                return future.result(timeout=self.site_timeout)
+            except concurrent.futures.TimeoutError:
+                self.logger.log(f"{site} did not finish in {self.site_timeout} seconds, terminating it",
+                                level='CRITICAL',
+                                site=site)
+                self._terminate_selenium_pool(pool, worker_pid, future)
+                pool, worker_pid = self._new_selenium_pool()
+                return None
+            except concurrent.futures.process.BrokenProcessPool:
+                pool.shutdown(wait=False)
+                pool, worker_pid = self._new_selenium_pool()
+                raise
+        finally:
+            self.selenium_pools.put((pool, worker_pid))
+
+    def run(self, sites):
+        """
+        Runs the given sites and waits until all of them finished or timed out.
+
+        Args:
+            sites (list): Names of the sites to be scraped.
+
+        Returns:
+            None
+        """
+        futures = {}
+        for site in sites:
+            method_name = apply_route(site, self.routes)
+            if method_name == "method_lxml":
+                future = self.lxml_dispatch.submit(self._dispatch, site, method_name)
+            elif method_name == "method_selenium":
+                future = self.selenium_dispatch.submit(self._dispatch, site, method_name)
+            else:
+                self.logger.log(f"Unknown scrape method {method_name}",
+                                level='ERROR',
+                                site=site)
+                continue
+            futures[future] = site
+
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.log("Site failed",
+                                level='ERROR',
+                                site=futures[future],
+                                exception=e)
+
+    def shutdown(self):
+        """
+        Shuts down the worker pools.
+        """
+        self.lxml_dispatch.shutdown(wait=False)
+        self.selenium_dispatch.shutdown(wait=False)
+        self.lxml_pool.shutdown(wait=False)
+        while not self.selenium_pools.empty():
+            pool, _ = self.selenium_pools.get_nowait()
+            pool.shutdown(wait=False)
@@ -1,578 +1,631 @@
-from common import Utils, DataFrames
+import os
+import time
+import heapq
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from common import Paths, Utils, CustomLogger
+
+
+DAY_MAPPING = {
+    0: "Monday",
+    1: "Tuesday",
+    2: "Wednesday",
+    3: "Thursday",
+    4: "Friday",
+    5: "Saturday",
+    6: "Sunday",
+}
+
+SITE_LISTS = {
+    "sites_at_01_30": {
+        "Monday": [
+            
+            
+            ],
+        "Tuesday": [
+            
+            
+            ],
+        "Wednesday": [
+            
+            
+            ],
+        "Thursday": [
+            
+            
+            ],
+        "Friday": [
+            
+            
+            ],
+        "Saturday": [
+            
+            
+            ],
+        "Sunday": [
+            
+            
+            ],
+        "Daily": [
 
+            ]
+    },       
+    "sites_at_02_00": {
+        "Monday": [
+            
+            
+            ],
+        "Tuesday": [
+            
+            
+            ],
+        "Wednesday": [
+            
+            
+            ],
+        "Thursday": [
+            
+            
+            ],
+        "Friday": [
+            
+            
+            ],
+        "Saturday": [
+            
+            
+            ],
+        "Sunday": [
+            
+            
+            ],
+        "Daily": [
 
-data_frames = DataFrames()
+            ]
+    },
+    "sites_at_03_00": {
+        "Monday": [
+            
+            
+            ],
+        "Tuesday": [
 
-def sites_to_run():
+            ],
+        "Wednesday": [
+            
+            ],
+        "Thursday": [
+            
+            
+            ],
+        "Friday": [
+            
+            
+            ],
+        "Saturday": [
+            
+            
+            ],
+        "Sunday": [
+            
+            
+            ],
+        "Daily": [
 
-    day_mapping = {
-        0: "Monday",
-        1: "Tuesday",
-        2: "Wednesday",
-        3: "Thursday",
-        4: "Friday",
-        5: "Saturday",
-        6: "Sunday",
-    }
+            ]
+    },
+    "sites_at_06_00": {
+        "Monday": [
+            
+
+            ],
+        "Tuesday": [
+
+
+            ],
+        "Wednesday": [
+            
+
+            ],
+        "Thursday": [
+            
+
+            ],
+        "Friday": [
+            
+
+            ],
+        "Saturday": [
+            
+
+            ],
+        "Sunday": [
+            
+
+            ],
+        "Daily": [
+
+            ]
+    },
+    "sites_at_07_00": {
+        "Monday": [
+            
+            ],
+        "Tuesday": [
+            
+            ],
+        "Wednesday": [
+            
+            ],
+        "Thursday": [
+            
+            ],
+        "Friday": [
+            
+            ],
+        "Saturday": [
+            
+            ],
+        "Sunday": [
+            
+            ],
+        "Daily": [
+
+            ]
+    },
+    "sites_at_07_30": {
+        "Monday": [
+            
+            ],
+        "Tuesday": [
+            
+            ],
+        "Wednesday": [
+
+            ],
+        "Thursday": [
+            
+            ],
+        "Friday": [
+            
+            ],
+        "Saturday": [
+            
+            ],
+        "Sunday": [
+            
+            ],
+        "Daily": [
+            
+            ]
+    },        
+    "sites_at_08_00": {
+        "Monday": [
+
+            ],
+        "Tuesday": [
+
+            ],
+        "Wednesday": [
+
+            ],
+        "Thursday": [
+
+            ],
+        "Friday": [
+
+            ],
+        "Saturday": [
 
-    site_lists = {
-        "sites_at_01_30": {
-            "Monday": [
-                
-                
-                ],
-            "Tuesday": [
-                
-                
-                ],
-            "Wednesday": [
-                
-                
-                ],
-            "Thursday": [
-                
-                
-                ],
-            "Friday": [
-                
-                
-                ],
-            "Saturday": [
-                
-                
-                ],
-            "Sunday": [
-                
-                
-                ],
-            "Daily": [
-
-                ]
-        },       
-        "sites_at_02_00": {
-            "Monday": [
-                
-                
-                ],
-            "Tuesday": [
-                
-                
-                ],
-            "Wednesday": [
-                
-                
-                ],
-            "Thursday": [
-                
-                
-                ],
-            "Friday": [
-                
-                
-                ],
-            "Saturday": [
-                
-                
-                ],
-            "Sunday": [
-                
-                
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_03_00": {
-            "Monday": [
-                
-                
-                ],
-            "Tuesday": [
-
-                ],
-            "Wednesday": [
-                
-                ],
-            "Thursday": [
-                
-                
-                ],
-            "Friday": [
-                
-                
-                ],
-            "Saturday": [
-                
-                
-                ],
-            "Sunday": [
-                
-                
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_06_00": {
-            "Monday": [
-                
-
-                ],
-            "Tuesday": [
-
-
-                ],
-            "Wednesday": [
-                
-
-                ],
-            "Thursday": [
-                
-
-                ],
-            "Friday": [
-                
-
-                ],
-            "Saturday": [
-                
-
-                ],
-            "Sunday": [
-                
-
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_07_00": {
-            "Monday": [
-                
-                ],
-            "Tuesday": [
-                
-                ],
-            "Wednesday": [
-                
-                ],
-            "Thursday": [
-                
-                ],
-            "Friday": [
-                
-                ],
-            "Saturday": [
-                
-                ],
-            "Sunday": [
-                
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_07_30": {
-            "Monday": [
-                
-                ],
-            "Tuesday": [
-                
-                ],
-            "Wednesday": [
-
-                ],
-            "Thursday": [
-                
-                ],
-            "Friday": [
-                
-                ],
-            "Saturday": [
-                
-                ],
-            "Sunday": [
-                
-                ],
-            "Daily": [
-                
-                ]
-        },        
-        "sites_at_08_00": {
-            "Monday": [
-
-                ],
-            "Tuesday": [
-
-                ],
-            "Wednesday": [
-
-                ],
-            "Thursday": [
-
-                ],
-            "Friday": [
-
-                ],
-            "Saturday": [
-
-                ],
-            "Sunday": [
-
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_09_00": {
-            "Monday": [
-                
-                ],
-            "Tuesday": [
-                
-                ],
-            "Wednesday": [
-
-                ],
-            "Thursday": [
-                
-                ],
-            "Friday": [
-                
-                ],
-            "Saturday": [
-
-                ],
-            "Sunday": [
-                
-                ],
-            "Daily": [
-
-                ]
-        },   
-        "sites_at_10_00": {
-            "Monday": [
-
-                ],
-            "Tuesday": [
-
-                ],
-            "Wednesday": [
-
-            "Thursday": [
-
-                ],
-            "Friday": [
-
-                ],
-            "Saturday": [
-
-                ],
-            "Sunday": [
-
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_12_00": {
-            "Monday": [
-                
-                ],
-            "Tuesday": [
-                
-                ],
-            "Wednesday": [
-                
-                ],
-            "Thursday": [
-                
-                ],
-            "Friday": [
-              
-                ],
-            "Saturday": [
-                
-                ],
-            "Sunday": [
-                
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_17_00": {
-            "Monday": [
-                
-                ],
-            "Tuesday": [
-                
-                ],
-            "Wednesday": [
-                
-                ],
-            "Thursday": [
-                
-                ],
-            "Friday": [
-                
-                ],
-            "Saturday": [
-            
-                ],
-            "Sunday": [
-                
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_19_00": {
-            "Monday": [
-                
-
-                ],
-            "Tuesday": [
-
-                ],
-            "Wednesday": [
-                
-                ],
-            "Thursday": [
-
-                ],
-            "Friday": [
-
-                ],
-            "Saturday": [
-                
-                
-                ],
-            "Sunday": [
-                
-                
-                ],
-            "Daily": [
-
-                ]
-        },
-        "sites_at_20_30": {
-            "Monday": [
-
-                ],
-            "Tuesday": [
-
-                ],
-            "Wednesday": [
-
-                ],
-            "Thursday": [
-
-                ],
-            "Friday": [
-
-                ],
-            "Saturday": [
-
-                ],
-            "Sunday": [
-
-                ],
-            "Daily": [
-
-                ]
-        },    
-        "sites_at_21_00": {
-            "Monday": [
-                ],
-            "Tuesday": [
-
-                ],
-            "Wednesday": [
-                
-                ],
-            "Thursday": [
-                
-                ],
-            "Friday": [
-                
-                ],
-            "Saturday": [
-              
-                ],
-            "Sunday": [
-                
-                ],
-            "Daily": [
-
-                ]
-        },    
-        "sites_at_23_00": {
-            "Monday": [
-                
-                ],
-            "Tuesday": [
-                
-                ],
-            "Wednesday": [
-                
-                ],
-            "Thursday": [
-                
-                ],
-            "Friday": [
-                
-                ],
-            "Saturday": [
-                
-                ],
-            "Sunday": [
-                
-                ],
-            "Daily": [
-
-                ]
-        },
-        "not_sorted":{
-            "Monday": [
-
-                ],
-            "Tuesday": [
-
-                ],
-            "Wednesday": [
-
-                ],
-            "Thursday": [
-
-                ],
-            "Friday": [
-
-
-                ],
-            "Saturday": [
-
-
-                ],
-            "Sunday": [
-
-
-                ],
-            "Daily": [
-              
-                ]
-        }
+            ],
+        "Sunday": [
+
+            ],
+        "Daily": [
+
+            ]
+    },
+    "sites_at_09_00": {
+        "Monday": [
+            
+            ],
+        "Tuesday": [
+            
+            ],
+        "Wednesday": [
+
+            ],
+        "Thursday": [
+            
+            ],
+        "Friday": [
+            
+            ],
+        "Saturday": [
+
+            ],
+        "Sunday": [
+            
+            ],
+        "Daily": [
+
+            ]
+    },   
+    "sites_at_10_00": {
+        "Monday": [
+
+            ],
+        "Tuesday": [
+
+            ],
+        "Wednesday": [
+
+            ],
+        "Thursday": [
+
+            ],
+        "Friday": [
+
+            ],
+        "Saturday": [
+
+            ],
+        "Sunday": [
+
+            ],
+        "Daily": [
+
+            ]
+    },
+    "sites_at_12_00": {
+        "Monday": [
+            
+            ],
+        "Tuesday": [
+            
+            ],
+        "Wednesday": [
+            
+            ],
+        "Thursday": [
+            
+            ],
+        "Friday": [
+          
+            ],
+        "Saturday": [
+            
+            ],
+        "Sunday": [
+            
+            ],
+        "Daily": [
+
+            ]
+    },
+    "sites_at_17_00": {
+        "Monday": [
+            
+            ],
+        "Tuesday": [
+            
+            ],
+        "Wednesday": [
+            
+            ],
+        "Thursday": [
+            
+            ],
+        "Friday": [
+            
+            ],
+        "Saturday": [
+        
+            ],
+        "Sunday": [
+            
+            ],
+        "Daily": [
+
+            ]
+    },
+    "sites_at_19_00": {
+        "Monday": [
+            
+
+            ],
+        "Tuesday": [
+
+            ],
+        "Wednesday": [
+            
+            ],
+        "Thursday": [
+
+            ],
+        "Friday": [
+
+            ],
+        "Saturday": [
+            
+            
+            ],
+        "Sunday": [
+            
+            
+            ],
+        "Daily": [
+
+            ]
+    },
+    "sites_at_20_30": {
+        "Monday": [
+
+            ],
+        "Tuesday": [
+
+            ],
+        "Wednesday": [
+
+            ],
+        "Thursday": [
+
+            ],
+        "Friday": [
+
+            ],
+        "Saturday": [
+
+            ],
+        "Sunday": [
+
+            ],
+        "Daily": [
+
+            ]
+    },    
+    "sites_at_21_00": {
+        "Monday": [
+            ],
+        "Tuesday": [
+
+            ],
+        "Wednesday": [
+            
+            ],
+        "Thursday": [
+            
+            ],
+        "Friday": [
+            
+            ],
+        "Saturday": [
+          
+            ],
+        "Sunday": [
+            
+            ],
+        "Daily": [
+
+            ]
+    },    
+    "sites_at_23_00": {
+        "Monday": [
+            
+            ],
+        "Tuesday": [
+            
+            ],
+        "Wednesday": [
+            
+            ],
+        "Thursday": [
+            
+            ],
+        "Friday": [
+            
+            ],
+        "Saturday": [
+            
+            ],
+        "Sunday": [
+            
+            ],
+        "Daily": [
+
+            ]
+    },
+    "not_sorted":{
+        "Monday": [
+
+            ],
+        "Tuesday": [
+
+            ],
+        "Wednesday": [
+
+            ],
+        "Thursday": [
+
+            ],
+        "Friday": [
+
+
+            ],
+        "Saturday": [
+
+
+            ],
+        "Sunday": [
+
+
+            ],
+        "Daily": [
+          
+            ]
     }
+}
+# Time of day after which each list is due, once per day.
+SLOT_TIMES = {
+    "sites_at_01_30": "01:30:00",
+    "sites_at_02_00": "02:15:00",
+    "sites_at_03_00": "03:15:00",
+    "sites_at_06_00": "06:15:00",
+    "sites_at_07_00": "07:15:00",
+    "sites_at_07_30": "07:45:00",
+    "sites_at_08_00": "08:15:00",
+    "sites_at_09_00": "09:15:00",
+    "sites_at_10_00": "10:15:00",
+    "sites_at_12_00": "12:15:00",
+    "sites_at_17_00": "17:15:00",
+    "sites_at_19_00": "19:15:00",
+    "sites_at_20_30": "20:35:00",
+    "sites_at_21_00": "21:00:00",
+    "sites_at_23_00": "23:00:00",
+    "not_sorted": "00:00:00",
+}
+
+
+class ScheduleState:
+    """
+    Keeps the days on which each list already ran in a small SQLite database.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Opens the schedule database and creates the table if needed.
+
+        Args:
+            db_path (str, optional): Path to the database file.
+        """
+        self.db_path = db_path or os.path.join(Paths().data_dir, "schedule.db")
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS schedule_runs ("
+            "list_name TEXT NOT NULL, run_date TEXT NOT NULL, run_at TEXT, "
+            "PRIMARY KEY (list_name, run_date))")
+        self.lock = threading.Lock()
+
+    def has_run(self, list_name, run_date):
+        """
+        Checks whether a list already ran on a given day.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM schedule_runs WHERE list_name = ? AND run_date = ?",
+                (list_name, run_date.isoformat())).fetchone()
+        return row is not None
+
+    def mark_run(self, list_name, run_date):
+        """
+        Records that a list ran on a given day.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO schedule_runs (list_name, run_date, run_at) VALUES (?, ?, ?)",
+                (list_name, run_date.isoformat(), Utils.get_current_time()))
+
+
+class Scheduler:
+    """
+    Runs the site lists at their slot times. The next run time of every list is kept
+    in a priority queue, and the scheduler sleeps until the earliest one is due
+    instead of polling.
+    """
+
+    def __init__(self, site_lists=None, slot_times=None, state=None):
+        """
+        Initializes the Scheduler object.
+
+        Args:
+            site_lists (dict, optional): Sites of each list per day of the week.
+            slot_times (dict, optional): Time of day after which each list is due.
+            state (ScheduleState, optional): Store of the lists which already ran.
+        """
+        self.site_lists = site_lists or SITE_LISTS
+        self.slot_times = slot_times or SLOT_TIMES
+        self.state = state or ScheduleState()
+        self.logger = CustomLogger()
+
+    def slot_datetime(self, list_name, day):
+        """
+        Returns the moment a list is due on a given day.
+        """
+        slot_time = datetime.strptime(self.slot_times[list_name], "%H:%M:%S").time()
+        return datetime.combine(day, slot_time)
+
+    def next_run(self, list_name, now):
+        """
+        Returns the next moment a list is due: today's slot if it did not run today, otherwise tomorrow's.
+        """
+        today = now.date()
+        if not self.state.has_run(list_name, today):
+            return max(self.slot_datetime(list_name, today), now)
+        return self.slot_datetime(list_name, today + timedelta(days=1))
+
+    def sites_for(self, list_name, day):
+        """
+        Returns the sites of a list for a given day, daily sites first.
+        """
+        day_list = self.site_lists.get(list_name, {})
+        current_day = DAY_MAPPING[day.weekday()]
+        return day_list.get("Daily", []) + day_list.get(current_day, [])
+
+    def take_due(self, list_names, now):
+        """
+        Marks the given lists as run today and returns their sites.
+        """
+        sites = []
+        for list_name in list_names:
+            if self.state.has_run(list_name, now.date()):
+                continue
+            self.state.mark_run(list_name, now.date())
+            sites.extend(self.sites_for(list_name, now.date()))
+            self.logger.log(f"{list_name} is due", level='MISC', site="Scheduler")
+        return sites
+
+    def due_sites(self, now=None):
+        """
+        Returns the sites of all lists which are due now and marks the lists as run.
+        """
+        now = now or datetime.now()
+        due_lists = [list_name for list_name in self.slot_times
+                     if self.slot_datetime(list_name, now.date()) <= now]
+        return self.take_due(due_lists, now)
+
+    def run_forever(self, callback):
+        """
+        Sleeps until the earliest list is due, runs the sites of every due list
+        in one batch and schedules those lists for the next day.
+
+        Args:
+            callback (callable): Called with the list of due sites.
+        """
+        now = datetime.now()
+        queue = [(self.next_run(list_name, now), list_name) for list_name in self.slot_times]
+        heapq.heapify(queue)
+        while True:
+            next_run, _ = queue[0]
+            delay = (next_run - datetime.now()).total_seconds()
+            if delay > 0:
+                time.sleep(delay)
+
+            now = datetime.now()
+            due_lists = []
+            while queue and queue[0][0] <= now:
+                due_lists.append(heapq.heappop(queue)[1])
+            sites = self.take_due(due_lists, now)
+            for list_name in due_lists:
+                heapq.heappush(queue, (self.next_run(list_name, now), list_name))
+            if sites:
+                callback(sites)
 
-    sites_to_run = []
-
-    for list_name, day_list in site_lists.items():
-        current_day = day_mapping.get(Utils.get_day_of_week())
-        current_time = Utils.get_current_time()
-        value = data_frames.read_save_schedule_df(list_name)
-        if value == "Yes":
-            continue
-        elif value == "No":
-            if current_day in day_list:
-                sites_list_for_current_day = day_list[current_day]
-                daily_sites = day_list.get("Daily", [])
-                if current_time > "01:30:00" and "sites_at_01_30" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "02:15:00" and "sites_at_02_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "03:15:00" and "sites_at_03_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "06:15:00" and "sites_at_06_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "07:15:00" and "sites_at_07_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "07:45:00" and "sites_at_07_30" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "08:15:00" and "sites_at_08_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "09:15:00" and "sites_at_09_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "10:15:00" and "sites_at_10_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "12:15:00" and "sites_at_12_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "17:15:00" and "sites_at_17_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "19:15:00" and "sites_at_19_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "20:35:00" and "sites_at_20_30" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "21:00:00" and "sites_at_21_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif current_time > "23:00:00" and "sites_at_23_00" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-                    data_frames.update_schedule_df(list_name)
-                elif "not_sorted" in list_name:
-                    if daily_sites:
-                        sites_to_run.append(daily_sites)
-                    if sites_list_for_current_day:
-                        sites_to_run.append(sites_list_for_current_day)
-        else:
-            print(f"Problem with {list_name}.")
-    sites_to_run = [site for sublist in sites_to_run for site in sublist]
-
-    return sites_to_run
+
+def sites_to_run():
+    """
+    Returns the sites of all lists which are due now and marks the lists as run.
+    """
+    return Scheduler().due_sites()
@@ -1,21 +1,73 @@
 import os
 import re
-import time
-from datetime import datetime
+import hashlib
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
 
-from io import BytesIO
-from PIL import Image, UnidentifiedImageError
-from dateutil.parser import parse, ParserError
+from PIL import UnidentifiedImageError
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException, WebDriverException
 
 
 from common import Paths, Utils, CustomLogger
 from exceptions_handling import RequestsHandling
+from downloads import StreamingDownloader
+from fetch import absolute_url
+from media import ImageProcessor
+from media_cache import MediaCache
+from xpaths import XPathCache
+from waits import PageWaits
+from dates import DateNormalizer
+from cleaning import TextCleaners
+
+
+# Evaluates the XPaths of every scrape type and returns, for each type, one record per
+# element of the first XPath that matches: its text, the requested attributes (read as
+# properties first, like WebElement.get_attribute), the texts of the model name nodes
+# inside it and the attributes of its video element.
+BATCH_EXTRACTION_SCRIPT = """
+const specs = arguments[0];
+const snapshot = (xpath, context) => {
+    const result = document.evaluate(xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+    return nodes;
+};
+const attribute = (node, name) => {
+    if (!node) return null;
+    const value = node[name];
+    if (typeof value === 'string') return value;
+    return node.getAttribute ? node.getAttribute(name) : null;
+};
+const records = {};
+for (const spec of specs) {
+    let nodes = [];
+    for (const xpath of spec.xpaths) {
+        try { nodes = snapshot(xpath, document); } catch (e) { nodes = []; }
+        if (nodes.length) break;
+    }
+    records[spec.type] = nodes.map(node => {
+        const record = {text: node.textContent, attributes: {}, models: {}, mtv: {}};
+        for (const name of spec.attributes) record.attributes[name] = attribute(node, name);
+        for (const xpath of spec.sub_xpaths) {
+            try { record.models[xpath] = snapshot(xpath, node).map(sub => sub.textContent); }
+            catch (e) { record.models[xpath] = []; }
+        }
+        if (spec.mtv_xpath) {
+            let mtv = null;
+            try { mtv = snapshot(spec.mtv_xpath, node)[0] || null; } catch (e) { mtv = null; }
+            for (const name of spec.attributes) record.mtv[name] = attribute(mtv, name);
+        }
+        return record;
+    });
+}
+return records;
+"""
+
 
 class SiteScraper:
 
-    def __init__(self, site_name, site, driver = None, tree = None):
+    def __init__(self, site_name, site, driver = None, tree = None, downloads = None):
         if driver is not None:
             self.driver = driver
         if tree is not None:
@@ -28,8 +80,57 @@ class SiteScraper:
         self.scraped_items = {}
         self.config = Utils.load_configs(site)
         self.url_site = self.config.get("site")
+        self.xpaths = XPathCache.for_config(self.config)
+        self.dates = DateNormalizer(site_name, self.config.get("date_format"))
+        self.cleaners = TextCleaners.for_config(self.config)
         self.paths = Paths()
         self.logger = CustomLogger()
+        self.downloads = downloads
+        self.waits = PageWaits(driver, site_name) if driver is not None else None
+
+    def home_xpaths(self, scrape_type):
+        """ 
+        Get the XPaths of the listing page elements for a scrape type.
+
+        Parameters:
+            scrape_type (str): Type of elements to scrape.
+
+        Returns:
+            list: The XPaths to try, in order.
+        """
+        xpaths = []
+        if scrape_type == "element":
+            xpaths = self.config.get(f"{scrape_type}_xpaths", {})
+        for location, attributes in self.config.get(f"{scrape_type}_info", {}).items():
+            if location == "home":
+                if isinstance(attributes, dict) and attributes:
+                    for attribute, xpaths1 in attributes.items():
+                        if not any(xpaths1):
+                            continue
+                        xpaths = xpaths1
+                elif isinstance(attributes, list) and attributes:
+                    if not any(attributes):
+                        continue
+                    else:
+                        xpaths = attributes
+                else:
+                    continue
+        return xpaths
+
+    def _log_elements_found(self, scrape_type, num_elements):
+        """ 
+        Log the number of elements found for a scrape type.
+        """
+        if not num_elements:
+            if scrape_type == "element":
+                self.logger.log(
+                    f"No {scrape_type} found", level='CRITICAL', site=self.site_name)
+            else:
+                self.logger.log(
+                    f"No {scrape_type} found", level='ERROR', site=self.site_name)
+        else:
+            self.logger.log(
+                f"Number of {scrape_type} found: {num_elements}", level='INFO', site=self.site_name)
 
     def scrape_elements(self, *scrape_types):
         """ 
@@ -43,28 +144,11 @@ class SiteScraper:
         """
         self.scraped_items = {}
         for scrape_type in scrape_types:
-            xpaths = []
             items = []
-            elements_found = False
+            num_elements = 0
             method = self.config.get("scrape_method")
-            xpaths_key = self.config.get(f"{scrape_type}_info", {})
+            xpaths = self.home_xpaths(scrape_type)
             xpaths_block = False
-            if scrape_type == "element":
-                xpaths = self.config.get(f"{scrape_type}_xpaths", {})
-            for location, attributes in xpaths_key.items():
-                if location == "home":
-                    if isinstance(attributes, dict) and attributes:
-                        for attribute, xpaths1 in attributes.items():
-                            if not any(xpaths1):
-                                continue
-                            xpaths = xpaths1
-                    elif isinstance(attributes, list) and attributes:
-                        if not any(attributes):
-                            continue
-                        else:
-                            xpaths = attributes
-                    else:
-                        continue
             for xpath in xpaths:
                 xpaths_block = True
                 if xpath:
@@ -75,26 +159,78 @@ class SiteScraper:
                             continue
 
                     elif method == "method_lxml":
-                        elements = self.tree.xpath(xpath)
+                        elements = self.xpaths.xpath(self.tree, xpath)
 
                     num_elements = len(elements)
                     if elements:
-                        elements_found = True
                         items.extend(elements)
                         break
 
+            if xpaths_block:
+                self._log_elements_found(scrape_type, num_elements)
+                if items:
+                    self.scraped_items[scrape_type] = items
 
-            if xpaths_block and not elements_found:
-                if scrape_type == "element":
-                    self.logger.log(
-                        f"No {scrape_type} found", level='CRITICAL', site=self.site_name)
-                else:
-                    self.logger.log(
-                        f"No {scrape_type} found", level='ERROR', site=self.site_name)
-            elif xpaths_block:
-                self.logger.log(
-                    f"Number of {scrape_type} found: {num_elements}", level='INFO', site=self.site_name)
-                self.scraped_items[scrape_type] = items
+        return self.scraped_items
+
+    def _record_spec(self, scrape_type):
+        """ 
+        Describe what the batch extraction script reads from the elements of a scrape type.
+
+        Parameters:
+            scrape_type (str): Type of elements to scrape.
+
+        Returns:
+            dict: The XPaths of the elements, the attributes to read, the XPaths of the
+                  model names inside each element and the XPath of the video element.
+        """
+        attributes = []
+        sub_xpaths = []
+        if scrape_type == "element":
+            attributes = [self.config.get("elements_attribute")]
+        elif scrape_type in ("image", "video"):
+            home = self.config.get(f"{scrape_type}_info", {}).get("home", {})
+            if isinstance(home, dict):
+                attributes = list(home)
+        elif scrape_type == "models":
+            home = self.config.get("models_info", {}).get("home", {})
+            if isinstance(home, dict):
+                sub_xpaths = list(home)
+        return {
+            "type": scrape_type,
+            "xpaths": [xpath for xpath in self.home_xpaths(scrape_type) if xpath],
+            "attributes": [attribute for attribute in attributes if attribute],
+            "sub_xpaths": sub_xpaths,
+            "mtv_xpath": (self.config.get("mtv_xpath") or None) if scrape_type == "video" else None,
+        }
+
+    def scrape_records(self, *scrape_types):
+        """ 
+        Scrape elements from the web page in a single WebDriver round trip. One script evaluates
+        the XPaths of all scrape types in the browser and returns plain records instead of
+        WebElements, so reading their text and attributes needs no further requests.
+
+        Parameters:
+            *scrape_types (str): Types of elements to scrape.
+
+        Returns:
+            dict: Dictionary containing the records of the elements found for each scrape type.
+        """
+        self.scraped_items = {}
+        specs = [self._record_spec(scrape_type) for scrape_type in scrape_types]
+        specs = [spec for spec in specs if spec["xpaths"]]
+        try:
+            records = self.driver.execute_script(BATCH_EXTRACTION_SCRIPT, specs) or {}
+        except WebDriverException as e:
+            self.logger.log("Batch extraction failed, scraping element by element",
+                            level='WARNING', site=self.site_name, exception=e)
+            return self.scrape_elements(*scrape_types)
+
+        for spec in specs:
+            items = records.get(spec["type"]) or []
+            self._log_elements_found(spec["type"], len(items))
+            if items:
+                self.scraped_items[spec["type"]] = items
 
         return self.scraped_items
 
@@ -142,83 +278,24 @@ class SiteScraper:
                     except NoSuchElementException:
                         continue
                 elif method == "method_lxml":
-                    date_element = tree.find(xpath)
+                    date_element = self.xpaths.find(tree, xpath)
                     if date_element is not None:
                         date = date_element.text_content().replace('\n', '').strip()
-        transformations = [
-            lambda text: text,  # No transformation
-            lambda text: text.replace(
-                "Date Added:", "") if "Date Added:" in text else text,
-            lambda text: text.replace(
-                "Published: ", "") if "Published: " in text else text,
-            lambda text: text.replace(
-                "PUBLISHED", "") if "PUBLISHED" in text else text,
-            lambda text: text.replace(
-                "Published", "") if "Published" in text else text,
-            lambda text: text.replace(
-                "Release Date:", "") if "Release Date:" in text else text,
-            lambda text: text.replace(
-                "Date:", "") if "Date:" in text else text,
-            lambda text: text.replace(
-                "Released:", "") if "Released:" in text else text,
-            lambda text: text.replace(
-                "Added on:", "") if "Added on:" in text else text,
-            lambda text: text.replace(
-                "Added:", "") if "Added:" in text else text,
-            lambda text: text.replace(
-                "Added", "") if "Added" in text else text,
-            lambda text: text.split('Available')[
-                0] if "Available" in text else text,
-            lambda text: text.split('Runtime')[
-                0] if "Runtime" in text else text,
-            lambda text: text.split("|")[0] if "|" in text else text,
-            lambda text: text.split("|")[1] if "|" in text else text,
-            lambda text: text.split("•")[1] if "•" in text else text,
-            lambda text: text.split(":")[1] if ":" in text else text,
-            lambda text: text.split("📅")[1] if "📅" in text else text,
-            lambda text: text.strip()
-        ]
-
-        transform_success = False
-        parser_error = None
-        value_error = None
         if date is not None:
-            for transform in transformations:
-                try:
-                    date = transform(date)
-                    date_format = self.config.get("date_format", [])
-                    if date_format:
-                        date = datetime.strptime(
-                            date, date_format).strftime("%b %d, %Y")
-                    else:
-                        date = parse(date).strftime("%b %d, %Y")
-                    self.logger.log("Date found", level='INFO',
-                                    site=self.site_name)
-                    self.date = date
-                    transform_success = True
-                    break
-                except ParserError as e:
-                    parser_error = e
-                except ValueError as e:
-                    value_error = e
-
-            if not transform_success:
-                if parser_error is not None:
-                    self.logger.log("Parsing error",
-                                    level='ERROR',
-                                    site=self.site_name,
-                                    exception=parser_error)
-                elif value_error is not None:
-                    self.logger.log("Value error",
-                                    level='ERROR',
-                                    site=self.site_name,
-                                    exception=value_error)
-            return self.date        
+            normalized = self.dates.normalize(date)
+            if normalized:
+                self.logger.log("Date found", level='INFO',
+                                site=self.site_name)
+                self.date = normalized
+            else:
+                self.logger.log(f"Parsing error: no date in {date!r}",
+                                level='ERROR',
+                                site=self.site_name)
+            return self.date
         else:
             self.logger.log("No date found",
                             level='ERROR',
-                            site=self.site_name,
-                            exception=value_error)
+                            site=self.site_name)
             return None
 
     def scrape_title(self, title_el=None, inner_tree=None):
@@ -250,15 +327,14 @@ class SiteScraper:
                 if method == "method_selenium":
                     try:
                         title_element = self.driver.find_element(By.XPATH, xpath)
-                        self.title = title_element.get_attribute(
-                            "textContent").replace('\n', '').strip().title()
+                        self.title = self.cleaners.clean("title", title_element.get_attribute("textContent"))
                         break
                     except NoSuchElementException:
                         continue
                 elif method == "method_lxml":
-                    title_element = tree.find(xpath)
+                    title_element = self.xpaths.find(tree, xpath)
                     if title_element is not None:
-                        self.title = title_element.text_content().replace('\n', '').strip().title()
+                        self.title = self.cleaners.clean("title", title_element.text_content())
 
         if self.title:
             self.logger.log("Title found", level='INFO',
@@ -298,23 +374,12 @@ class SiteScraper:
                     continue
 
             elif method == "method_lxml":
-                description_element = tree.find(xpath)
+                description_element = self.xpaths.find(tree, xpath)
                 if description_element is not None:
                     text = description_element.text_content()
 
         if text:
-            transformations = [
-                lambda text: text.replace('\n', ''),
-                lambda text: text.replace("Synopsis", ""),
-                lambda text: text.replace("DESCRIPTION:", ""),
-                lambda text: text.replace("Description:", ""),
-                lambda text: text.replace("Episode Summary", ""),
-                lambda text: text.strip(),
-            ]
-            for transform in transformations:
-                text = transform(text)
-
-            self.description = text
+            self.description = self.cleaners.clean("description", text)
             self.logger.log("Description found",
                             level='INFO',
                             site=self.site_name)
@@ -352,16 +417,16 @@ class SiteScraper:
                     num_tags_elements = len(tags_elements)
                     if not tags_elements:
                         raise NoSuchElementException
-                    tags_names = [tag.get_attribute("textContent").title().replace(",", "").replace('\n', '').strip() for tag in tags_elements]
+                    tags_names = [self.cleaners.clean("tags", tag.get_attribute("textContent")) for tag in tags_elements]
                     self.tags = ', '.join(tags_names)
                     break
                 except NoSuchElementException:
                     continue
             elif method == "method_lxml":
-                tags_elements = tree.xpath(xpath)
+                tags_elements = self.xpaths.xpath(tree, xpath)
                 num_tags_elements = len(tags_elements)
                 if tags_elements:
-                    tags_names = [tag.text_content().title().replace(",", "").replace('\n', '').strip() for tag in tags_elements]
+                    tags_names = [self.cleaners.clean("tags", tag.text_content()) for tag in tags_elements]
                     self.tags = ', '.join(tags_names)
 
         if not self.tags:
@@ -382,11 +447,6 @@ class SiteScraper:
         Returns:
         list: A list of scraped models.
         """
-        transformations = [
-            lambda text: text.title().replace(',', '').strip(),
-            lambda text: text.title().replace(',', '').strip().strip("Starring: ") if text.startswith("Starring: ") else text.title().replace(',', '').strip(),
-        ]
-
         if inner_tree is not None:
             tree = inner_tree
         xpaths_key = self.config.get(f"image_info", {})
@@ -416,16 +476,14 @@ class SiteScraper:
                             except NoSuchElementException:
                                 continue
                         elif method == "method_lxml":
-                            models_elements = tree.xpath(xpath)
+                            models_elements = self.xpaths.xpath(tree, xpath)
                         num_models_elements = len(models_elements)
                         for model in models_elements:
                             if method == "method_selenium":
                                 processed_name = model.get_attribute("textContent")
                             elif method == "method_lxml":
                                 processed_name = model.text_content()
-                            for transform in transformations:
-                                processed_name = transform(processed_name)
-                            models_names.append(processed_name)
+                            models_names.append(self.cleaners.clean("models", processed_name))
                         self.models = ', '.join(models_names)
                         break
 
@@ -465,33 +523,146 @@ class ImageScraper(SiteScraper):
 
         return link
 
+    def _log_saved_image(self, future):
+        """ 
+        Log the result of a transcoding job.
+
+        Parameters:
+            future (Future): The future of the path of the saved image.
+        """
+        try:
+            path_image = future.result()
+        except UnidentifiedImageError as e:
+            self.logger.log("UnidentifiedImageError: Image format not recognized.",
+                            level='ERROR', site=self.site_name, exception=e)
+            return None
+        except (OSError, BrokenProcessPool) as e:
+            self.logger.log("Failed to save image",
+                            level='ERROR', site=self.site_name, exception=e)
+            return None
+        if os.path.exists(path_image):
+            self.logger.log(
+                f"Image saved at {path_image}.", level='PATH', site=self.site_name)
+            self.logger.log("Image saved", level='INFO', site=self.site_name)
+        else:
+            self.logger.log("Failed to save image",
+                            level='ERROR', site=self.site_name)
+        return None
+
+    def _cached_image(self, blob_path, path_image, wait):
+        """ 
+        Link an image from the media cache to the given path instead of downloading it.
+
+        Parameters:
+            blob_path (str): Path of the cached image.
+            path_image (str): Path of the image file.
+            wait (bool): Return the path instead of a completed future.
+
+        Returns:
+            The path to the image file, or its completed future.
+        """
+        path_image = MediaCache.link(blob_path, path_image)
+        self.logger.log(
+            f"Image linked from cache at {path_image}.", level='PATH', site=self.site_name)
+        if wait:
+            return path_image
+        future = concurrent.futures.Future()
+        future.set_result(path_image)
+        return future
+
+    def _cache_image(self, cache, link, digest, extension, variant, headers, future):
+        """ 
+        Add a transcoded image to the media cache once its job is done.
+
+        Parameters:
+            cache (MediaCache): The media cache.
+            link (str): The link of the image.
+            digest (str): Hash of the downloaded image.
+            extension (str): File extension of the transcoded image.
+            variant (str): Transcoding variant of the image.
+            headers (dict): Headers of the image response.
+            future (Future): The future of the path of the saved image.
+        """
+        if future.exception() is not None:
+            return None
+        path_image = future.result()
+        if not os.path.exists(path_image):
+            return None
+        try:
+            cache.adopt(path_image, link, digest, extension,
+                        etag=headers.get('ETag'), last_modified=headers.get('Last-Modified'), variant=variant)
+        except OSError as e:
+            self.logger.log("Failed to add the image to the media cache",
+                            level='WARNING', site=self.site_name, exception=e)
+        return None
+
+    def download_image(self, link, path_image, wait=False):
+        """ 
+        Download the image from the given link and queue it for transcoding in the image process pool.
+        Images already in the media cache, by URL or by content, are linked from the cache instead.
+
+        Parameters:
+            link (str): The link to the image.
+            path_image (str): Path of the image file.
+            wait (bool): Wait for the transcoding and return the path instead of its future.
+
+        Returns:
+            tuple: The link used for the request and the future of the path to the saved image file
+                   (the path itself with wait), or None if saving failed.
+        """
+        cache = MediaCache.shared()
+        processor = ImageProcessor.shared()
+        cache_key = absolute_url(self.url_site, link)
+        entry = cache.lookup(cache_key, processor.extension, processor.variant) if cache else None
+        if entry and not cache.revalidate:
+            return cache_key, self._cached_image(entry["path"], path_image, wait)
+
+        response_image, img_inside = RequestsHandling(
+            self.url_site, link, MediaCache.conditional_headers(entry) or None).main()
+        if response_image is not None and response_image.status_code == 304 and entry:
+            return img_inside, self._cached_image(entry["path"], path_image, wait)
+        if not response_image:
+            self.logger.log("Failed to download image",
+                            level='ERROR', site=self.site_name)
+            return img_inside, None
+
+        if cache:
+            digest = hashlib.sha256(response_image.content).hexdigest()
+            blob_path = cache.find_blob(digest, processor.extension, processor.variant)
+            if blob_path:
+                cache.remember(cache_key, cache.blob_key(digest, processor.extension, processor.variant),
+                               response_image.headers.get('ETag'), response_image.headers.get('Last-Modified'))
+                return img_inside, self._cached_image(blob_path, path_image, wait)
+
+        future = processor.submit(response_image.content, path_image)
+        future.add_done_callback(self._log_saved_image)
+        if cache:
+            future.add_done_callback(lambda done: self._cache_image(
+                cache, cache_key, digest, processor.extension, processor.variant, response_image.headers, done))
+        if not wait:
+            return img_inside, future
+        try:
+            return img_inside, future.result()
+        except (OSError, BrokenProcessPool):
+            return None, None
+
     def save_image(self):
         """ 
-        Save the image from the provided link.
+        Save the image from the provided link. The scraper gets a future of the path back
+        instead of waiting: with a download pipeline the download itself is queued,
+        otherwise only the transcoding runs in the background.
 
         Returns:
-            str: Path to the saved image file, or None if saving failed.
+            tuple: The image link and the future of the path to the saved image file, or None if saving failed.
         """
-        path_image = self.paths.create_image_path(self.site_name, self.counter_img)
-        response_image, img_inside = RequestsHandling(self.url_site, self.link_for_image).main()
-        if response_image:
-            try:
-                image = Image.open(BytesIO(response_image.content))
-                image = image.convert("RGB")
-                image.save(path_image, optimize=True, quality=50)
-                if os.path.exists(path_image):
-                    self.logger.log(
-                        f"Image saved at {path_image}.", level='PATH', site=self.site_name)
-                else:
-                    self.logger.log("Failed to save image",
-                                    level='ERROR', site=self.site_name)
-                self.counter_img += 1
-                self.logger.log("Image saved", level='INFO', site=self.site_name)
-            except UnidentifiedImageError as e:
-                self.logger.log("UnidentifiedImageError: Image format not recognized.",
-                                level='ERROR', site=self.site_name, exception=e)
-                return None, None
-        return img_inside, path_image
+        path_image = self.paths.create_image_path(self.site_name, self.counter_img, ImageProcessor.shared().extension)
+        self.counter_img += 1
+        if self.downloads is not None:
+            link = absolute_url(self.url_site, self.link_for_image)
+            future = self.downloads.submit(link, lambda: self.download_image(link, path_image, wait=True)[1])
+            return link, future
+
+        return self.download_image(self.link_for_image, path_image)
 
     def scrape_image(self, image_home=None, inner_tree=None):
         """ Scrape image link from the web page.
@@ -528,27 +699,26 @@ class ImageScraper(SiteScraper):
                                 except NoSuchElementException:
                                     continue
                                 except StaleElementReferenceException:
-                                    time.sleep(3)
                                     self.logger.log(
                                         "Stale element. Re-finding elements.", 
                                         level='WARNING', 
                                         site=self.site_name)
-                                    link_to_source = self.driver.find_element(By.XPATH, xpath)
+                                    link_to_source = self.waits.refind((By.XPATH, xpath))
+                                    if link_to_source is None:
+                                        continue
                                 try:
                                     img_inside = self.image_link_replacements(
                                         link_to_source.get_attribute(attribute), replacements)
                                 except StaleElementReferenceException:
-                                    time.sleep(3)
                                     self.logger.log(
                                         "Stale element. Re-finding elements.",
                                         level='WARNING',
                                         site=self.site_name)
-                                    link_to_source = self.driver.find_element(By.XPATH, xpath)
                                     img_inside = self.image_link_replacements(
-                                        link_to_source.get_attribute(attribute), replacements)
+                                        self.waits.read_attribute((By.XPATH, xpath), attribute), replacements)
 
                             elif method =="method_lxml":
-                                link_to_source = tree.find(xpath)
+                                link_to_source = self.xpaths.find(tree, xpath)
                                 img_inside = self.image_link_replacements(link_to_source.get(attribute), replacements)
 
                             if img_inside:
@@ -613,31 +783,48 @@ class VideoScraper(SiteScraper):
                         link = link.replace(to_replace, replacement_str)
         return link
 
+    def download_video(self, link, path_video):
+        """ 
+        Download the video from the given link to the given path, streaming it to disk in chunks.
+
+        Parameters:
+            link (str): The link to the video.
+            path_video (str): Path of the video file.
+
+        Returns:
+            tuple: The link used for the request and the path to the saved video file, or None if saving failed.
+        """
+        vid_inside, path_video = StreamingDownloader(self.site_name).download(self.url_site, link, path_video)
+        if path_video and os.path.exists(path_video):
+            self.logger.log(
+                f"Trailer saved at {path_video}", level='PATH', site=self.site_name)
+        else:
+            self.logger.log("Failed to save trailer",
+                            level='ERROR', site=self.site_name)
+        return vid_inside, path_video
+
     def save_video(self):
         """ 
-        Save the video from the provided link.
+        Save the video from the provided link. With a download pipeline the video
+        is queued and a future of its path is returned instead of waiting for it.
 
         Returns:
-            str: Path to the saved video file, or None if saving failed.
+            tuple: The video link and the path to the saved video file (or its future), or None if saving failed.
         """
         path_video = None
+        vid_inside = self.link_for_trailer
         if self.link_for_trailer is not None and self.link_for_trailer.startswith("blob"):
             self.logger.log(f"Video starts with blob",
                             level='WARNING', 
                             site=self.site_name)
         else:
             path_video = self.paths.create_video_path(self.site_name, self.counter_vid)
-            response_video, vid_inside = RequestsHandling(self.url_site, self.link_for_trailer).main()
-            if response_video:
-                with open(path_video, 'wb') as video_file:
-                    video_file.write(response_video.content)
-            if os.path.exists(path_video):
-                self.logger.log(
-                    f"Trailer saved at {path_video}", level='PATH', site=self.site_name)
-            else:
-                self.logger.log("Failed to save trailer",
-                                level='ERROR', site=self.site_name)
             self.counter_vid += 1
+            if self.downloads is not None:
+                link = absolute_url(self.url_site, self.link_for_trailer)
+                future = self.downloads.submit(link, lambda: self.download_video(link, path_video)[1])
+                return link, future
+            vid_inside, path_video = self.download_video(self.link_for_trailer, path_video)
 
         return vid_inside, path_video
 
@@ -677,25 +864,22 @@ class VideoScraper(SiteScraper):
                                 except NoSuchElementException:
                                     continue
                                 except StaleElementReferenceException:
-                                    time.sleep(3)
                                     self.logger.log(
                                         "Stale element. Re-finding elements.", level='WARNING', site=self.site_name)
-                                    link_to_source = self.driver.find_element(
-                                        By.XPATH, xpath)
+                                    link_to_source = self.waits.refind((By.XPATH, xpath))
+                                    if link_to_source is None:
+                                        continue
                                 try:
                                     vid_inside = self.video_link_replacements(
                                         link_to_source.get_attribute(attribute), replacements)
                                 except StaleElementReferenceException:
-                                    time.sleep(3)
                                     self.logger.log(
                                         "Stale element. Re-finding elements.", level='WARNING', site=self.site_name)
-                                    link_to_source = self.driver.find_element(
-                                        By.XPATH, xpath)
                                     vid_inside = self.video_link_replacements(
-                                        link_to_source.get_attribute(attribute), replacements)
+                                        self.waits.read_attribute((By.XPATH, xpath), attribute), replacements)
 
                             elif method =="method_lxml":
-                                link_to_source = tree.find(xpath)
+                                link_to_source = self.xpaths.find(tree, xpath)
                                 if link_to_source is not None:
                                     vid_inside = self.video_link_replacements(link_to_source.get(attribute), replacements)
                             if vid_inside:
@@ -1,19 +1,30 @@
-import time
-import requests
-
-
 from lxml import html
-from itertools import zip_longest
+from itertools import zip_longest, islice
+from collections import deque
 from selenium.webdriver import ActionChains
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+import time
+import functools
 import concurrent.futures
 
 
-from common import Utils
+from common import Utils, CustomLogger
 from scrape import SiteScraper, ImageScraper, VideoScraper
 from buttons import InteractWithButtons
+from storage import get_storage
+from catalog import ScrapeCatalog
+from dedup import DedupIndex
 from exceptions_handling import RequestsHandling
+from fetch import AsyncFetcher, absolute_url
+from drivers import DriverPool, blocked_url_patterns
+from downloads import DownloadPipeline
+from xpaths import XPathCache
+from cleaning import TextCleaners
+from routes import RouteStore, auto_route_enabled, cookie_header
+from waits import PageWaits
+from incremental import IncrementalCrawl
+from pagination import ListingPages
 
 
 def extract_href_data(item, config):
@@ -21,14 +32,17 @@ def extract_href_data(item, config):
     Extracts the href attribute from an HTML element.
 
     Args:
-    - item (WebElement or Element): The HTML element to extract the href attribute from.
+    - item (WebElement, Element or dict): The HTML element to extract the href attribute from,
+      or its record from batch extraction.
     - config (dict): Configuration settings for scraping.
 
     Returns:
     - str: The value of the href attribute.
     """
     method = config.get("scrape_method")
-    if method == "method_selenium":
+    if isinstance(item, dict):
+        href = item["attributes"].get(config.get("elements_attribute"))
+    elif method == "method_selenium":
         href = item.get_attribute(config.get("elements_attribute"))
     elif method == "method_lxml":
         href = item.get(config.get("elements_attribute"))
@@ -40,14 +54,17 @@ def extract_title_data(item, config):
     Extracts the title data from an HTML element.
 
     Args:
-    - item (WebElement or Element): The HTML element to extract title data from.
+    - item (WebElement, Element or dict): The HTML element to extract title data from,
+      or its record from batch extraction.
     - config (dict): Configuration settings for scraping.
 
     Returns:
     - str: The extracted title data.
     """
     method = config.get("scrape_method")
-    if method == "method_selenium":
+    if isinstance(item, dict):
+        title_el = (item["text"] or "").strip().title()
+    elif method == "method_selenium":
         title_el = item.get_attribute("textContent").strip().title()
     elif method == "method_lxml":
         title_el = item.text_content().strip().title()
@@ -59,14 +76,17 @@ def extract_date_data(item, config):
     Extracts the date data from an HTML element.
 
     Args:
-    - item (WebElement or Element): The HTML element to extract date data from.
+    - item (WebElement, Element or dict): The HTML element to extract date data from,
+      or its record from batch extraction.
     - config (dict): Configuration settings for scraping.
 
     Returns:
     - str: The extracted date data.
     """
     method = config.get("scrape_method")
-    if method == "method_selenium":
+    if isinstance(item, dict):
+        date_el = (item["text"] or "").strip().title()
+    elif method == "method_selenium":
         date_el = item.get_attribute("textContent").strip().title()
     elif method == "method_lxml":
         date_el = item.text_content().strip()
@@ -78,37 +98,27 @@ def extract_models_data(item, config):
     Extracts model names from the given item based on the provided configuration.
 
     Args:
-    - item (WebElement or Element): The element to extract model names from.
+    - item (WebElement, Element or dict): The element to extract model names from,
+      or its record from batch extraction.
     - config (dict): Configuration settings for scraping.
 
     Returns:
     - list: A list of model names extracted from the item.
     """
     method = config.get("scrape_method")
+    clean = TextCleaners.for_config(config).cleaners["models"]
     for location, attributes in config.get("models_info", {}).items():
         if location == "home":
             if isinstance(attributes, dict) and attributes:
                 for xpath, _ in attributes.items():
-                    transformations = [
-                        lambda text: text.title().replace(',', '').strip(),
-                        lambda text: text.title().replace(',', '').strip().strip("Starring: ") if text.startswith("Starring: ") else text.title().replace(',', '').strip(),
-                    ]
-                    if method == "method_selenium":
+                    if isinstance(item, dict):
+                        models_names = [clean(name) for name in item["models"].get(xpath) or []]
+                    elif method == "method_selenium":
                         models_el = item.find_elements(By.XPATH, xpath)
-                        models_names = []
-                        for model in models_el:
-                            processed_name = model.get_attribute("textContent")
-                            for transform in transformations:
-                                processed_name = transform(processed_name)
-                            models_names.append(processed_name)
+                        models_names = [clean(model.get_attribute("textContent")) for model in models_el]
                     elif method == "method_lxml":
-                        models_el = item.xpath(xpath)
-                        models_names = []
-                        for model in models_el:
-                            processed_name = model.text_content().strip()
-                            for transform in transformations:
-                                processed_name = transform(processed_name)
-                            models_names.append(processed_name)
+                        models_el = XPathCache.for_config(config).xpath(item, xpath)
+                        models_names = [clean(model.text_content()) for model in models_el]
 
     return models_names
 
@@ -118,7 +128,8 @@ def extract_image_data(scrape_image, item, config):
 
     Args:
     - scrape_image (Image scraper): The Image scrapping function used for scraping images.
-    - item (WebElement or Element): The element containing image data.
+    - item (WebElement, Element or dict): The element containing image data,
+      or its record from batch extraction.
     - config (dict): Configuration settings for scraping.
 
     Returns:
@@ -130,22 +141,26 @@ def extract_image_data(scrape_image, item, config):
         if location == "home":
             if isinstance(attributes, dict) and attributes:
                 for attribute, _ in attributes.items():
-                    if method == "method_selenium":
+                    if isinstance(item, dict):
+                        image_home_page = scrape_image.image_link_replacements(item["attributes"].get(attribute), replacements)
+                    elif method == "method_selenium":
                         image_home_page = scrape_image.image_link_replacements(item.get_attribute(attribute), replacements)
                     elif method == "method_lxml":
                         image_home_page = scrape_image.image_link_replacements(item.get(attribute), replacements)
 
     return image_home_page
 
-def extract_video_data(scrape_video, item, config, driver=None):
+def extract_video_data(scrape_video, item, config, driver=None, waits=None):
     """
     Extracts video data from the given item based on the provided configuration.
 
     Args:
     - scrape_video (Video scrapper): The Video scrapping function used for scraping videos.
-    - item (WebElement or Element): The element containing video data.
+    - item (WebElement, Element or dict): The element containing video data,
+      or its record from batch extraction (not used with move_to_video).
     - config (dict): Configuration settings for scraping.
     - driver (WebDriver, optional): The WebDriver instance. Required if using Selenium.
+    - waits (PageWaits, optional): The waits of the page, created from the driver if not given.
 
     Returns:
     - str: The link to the video source.
@@ -156,24 +171,42 @@ def extract_video_data(scrape_video, item, config, driver=None):
         if location == "home":
             if isinstance(attributes, dict) and attributes:
                 for attribute, _ in attributes.items():
-                    if method == "method_selenium":
+                    if isinstance(item, dict):
+                        source = item["mtv"] if config.get("mtv_xpath") else item["attributes"]
+                        vid_home_page = scrape_video.video_link_replacements(source.get(attribute), replacements)
+                    elif method == "method_selenium":
                         move_to_video = config.get("move_to_video")
                         mtv_xpath = config.get("mtv_xpath")
                         if move_to_video and driver:
-                            actions = ActionChains(driver)
-                            time.sleep(2)
-                            driver.execute_script("arguments[0].scrollIntoView();", item)
-                            time.sleep(1)
-                            driver.execute_script("window.scrollBy(0, -200);")
-                            time.sleep(1)
-                            actions.move_to_element(item).perform()
-                            time.sleep(2)
-                        if mtv_xpath:
-                            mtv = item.find_element(By.XPATH, mtv_xpath)
+                            # Hovering loads the preview: wait for the link to change instead of sleeping.
+                            # The preview element may only be injected by the hover, so it is found after it.
+                            waits = waits or PageWaits(driver, scrape_video.site_name)
+                            if mtv_xpath:
+                                before_hover = item.find_elements(By.XPATH, mtv_xpath)
+                                before = before_hover[0].get_attribute(attribute) if before_hover else None
+                            else:
+                                before = item.get_attribute(attribute)
+                            waits.dom_stable()
+                            waits.in_view(item, offset=-200)
+                            ActionChains(driver).move_to_element(item).perform()
+                            if mtv_xpath:
+                                try:
+                                    mtv = waits.until("refind", lambda driver: item.find_element(By.XPATH, mtv_xpath), 5,
+                                                      ignored=(NoSuchElementException, StaleElementReferenceException))
+                                except TimeoutException:
+                                    mtv = None
+                            else:
+                                mtv = item
+                            if mtv:
+                                link = waits.attribute_changed(mtv, attribute, old_value=before)
+                                vid_home_page = scrape_video.video_link_replacements(link, replacements)
                         else:
-                            mtv = item
-                        if mtv:
-                            vid_home_page = scrape_video.video_link_replacements(mtv.get_attribute(attribute), replacements)
+                            if mtv_xpath:
+                                mtv = item.find_element(By.XPATH, mtv_xpath)
+                            else:
+                                mtv = item
+                            if mtv:
+                                vid_home_page = scrape_video.video_link_replacements(mtv.get_attribute(attribute), replacements)
                     elif method == "method_lxml":
                         vid_home_page = scrape_video.video_link_replacements(item.get(attribute), replacements)
 
@@ -182,8 +215,37 @@ def extract_video_data(scrape_video, item, config, driver=None):
 
 class Methods:
 
-    def __init__(self):
+    def __init__(self, deadline=None):
+        """
+        Args:
+            deadline (float, optional): time.monotonic() value after which method_lxml stops scraping.
+        """
+        self.deadline = deadline
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self.storage = get_storage()
+        self.catalog = ScrapeCatalog()
+        self.routes = RouteStore()
+        self.fetcher = AsyncFetcher.shared()
+        self.logger = CustomLogger()
+        self.downloads = DownloadPipeline.shared() if Utils.load_settings("downloads").get("pipeline", True) else None
+        self.pending_downloads = []
+
+    def _out_of_time(self, site_name):
+        """
+        This function checks whether the deadline of the site has passed, logging it when it has.
+
+        Args:
+            site_name (str): The name of the website being scraped.
+
+        Returns:
+            bool: True if the site has to stop.
+        """
+        if self.deadline is None or time.monotonic() < self.deadline:
+            return False
+        self.logger.log("Site timeout reached, saving the items scraped so far",
+                        level='CRITICAL',
+                        site=site_name)
+        return True
 
     def _initialize_scrapers(self, site_name, site, driver=None, tree=None):
         """
@@ -202,11 +264,179 @@ class Methods:
                 - video_scraper (VideoScraper): A VideoScraper object used for scraping videos.
         """
         scrape = SiteScraper(site_name, site, driver=driver, tree=tree)
-        image_scraper = ImageScraper(site_name, site, driver=driver)
-        video_scraper = VideoScraper(site_name, site, driver=driver)
+        image_scraper = ImageScraper(site_name, site, driver=driver, downloads=self.downloads)
+        video_scraper = VideoScraper(site_name, site, driver=driver, downloads=self.downloads)
 
         return scrape, image_scraper, video_scraper
 
+    def _load_dedup_index(self, site_name):
+        """
+        This function loads the dedup index of a site from the catalog.
+
+        Args:
+            site_name (str): The name of the website being scraped.
+
+        Returns:
+            DedupIndex: The dedup index of the site.
+        """
+        dedup_settings = Utils.load_settings("dedup")
+        return DedupIndex.from_catalog(
+            self.catalog,
+            site_name,
+            use_bloom=dedup_settings.get("bloom_filter", False),
+            false_positive_rate=dedup_settings.get("false_positive_rate", 0.001))
+
+    def _register_downloads(self, row):
+        """
+        This function registers the download jobs of a scraped row. Media paths which
+        are still downloading are filled in when their download job completes.
+
+        Args:
+            row (list): The scraped row.
+
+        Returns:
+            list: The row.
+        """
+        for index, value in enumerate(row):
+            if isinstance(value, concurrent.futures.Future):
+                row[index] = '-'
+                self.pending_downloads.append(value)
+                value.add_done_callback(functools.partial(self._fill_download_path, row, index))
+        return row
+
+    def _append_row(self, row):
+        """
+        This function appends a scraped row to the data.
+
+        Args:
+            row (list): The scraped row.
+        """
+        self.data.append(self._register_downloads(row))
+
+    def _detect_route(self, site_name, url_site, driver, scrape, scraped_items):
+        """
+        This function checks whether a Selenium site can be scraped without a browser:
+        the listing page is fetched over plain HTTP with the cookies of the session
+        (e.g. set by the enter button), and the number of elements found by each
+        configured XPath is compared with the Selenium run. The result is stored,
+        so sites which pass run with method_lxml from then on.
+
+        Args:
+            site_name (str): The name of the website being scraped.
+            url_site (str): The URL of the listing page.
+            driver (WebDriver): The WebDriver instance, on the listing page.
+            scrape (SiteScraper): The scraper of the site.
+            scraped_items (dict): The elements found by Selenium for each scrape type.
+        """
+        selenium_counts = {key: len(items) for key, items in scraped_items.items()}
+        if not selenium_counts.get("element"):
+            return None
+        cookies = {cookie["name"]: cookie["value"] for cookie in driver.get_cookies()}
+        response = self.fetcher.fetch(url_site, headers=cookie_header(cookies), site=site_name)
+        lxml_counts = {}
+        if response is not None and response.status_code == 200:
+            tree = html.fromstring(response.content)
+            for key in selenium_counts:
+                for xpath in scrape.home_xpaths(key):
+                    found = len(scrape.xpaths.xpath(tree, xpath)) if xpath else 0
+                    if found:
+                        lxml_counts[key] = found
+                        break
+
+        method = "method_lxml" if lxml_counts == selenium_counts else "method_selenium"
+        self.routes.set(site_name, method, cookies if method == "method_lxml" else None,
+                        selenium_counts["element"], lxml_counts.get("element", 0))
+        self.logger.log(f"Route detected: {method} (Selenium found {selenium_counts}, plain HTML {lxml_counts})",
+                        level='INFO',
+                        site=site_name)
+        return None
+
+    def _open_tab(self, driver, href):
+        """
+        This function opens a page in a new background tab.
+
+        Args:
+            driver (WebDriver): The WebDriver instance.
+            href (str): The link of the page.
+
+        Returns:
+            str: The handle of the new tab, or None if no tab was opened.
+        """
+        known = set(driver.window_handles)
+        driver.execute_script("window.open(arguments[0], '_blank');", href)
+        new_tabs = [handle for handle in driver.window_handles if handle not in known]
+        return new_tabs[0] if new_tabs else None
+
+    def _scrape_detail_tab(self, site_name, config, detail, scrape, scrape_image, scrape_video, buttons):
+        """
+        This function scrapes the detail page of an item in the current tab.
+
+        Args:
+            site_name (str): The name of the website being scraped.
+            config (dict): Configuration settings for scraping.
+            detail (dict): The link and the data of the item scraped from the listing page.
+            scrape (SiteScraper): The scraper of the site.
+            scrape_image (ImageScraper): The scraper of the images.
+            scrape_video (VideoScraper): The scraper of the videos.
+            buttons (InteractWithButtons): The buttons of the site.
+
+        Returns:
+            list: The scraped row.
+        """
+        link_to_src_image, path_image = scrape_image.scrape_image(detail["image_home_page"])
+        buttons.click_video()
+        link_for_trailer, path_video = scrape_video.scrape_video(detail["vid_home_page"])
+        if config.get("gobackvp"):
+            scrape.driver.execute_script("window.history.go(-1)")
+        buttons.expand_desc_button()
+        title = scrape.scrape_title(detail["title_el"])
+        date = scrape.scrape_date(detail["date_el"])
+        description = scrape.scrape_description()
+        buttons.expand_tags_button()
+        tags = scrape.scrape_tags()
+        models = scrape.scrape_models(detail["models_names"])
+        return [
+            site_name or '-',
+            date or '-',
+            title or '-',
+            description or '-',
+            tags or '-',
+            models or '-',
+            link_for_trailer or '-',
+            detail["href"] or '-',
+            link_to_src_image or '-',
+            path_image or '-',
+            path_video or '-'
+        ]
+
+    def _fill_download_path(self, row, index, future):
+        """
+        This function fills in the path of a completed download job.
+        """
+        try:
+            row[index] = future.result() or '-'
+        except Exception as e:
+            self.logger.log("Download job failed",
+                            level='ERROR',
+                            site=row[0],
+                            exception=e)
+
+    def _wait_for_downloads(self, site_name):
+        """
+        This function waits for the download jobs of the current site, until the deadline
+        of the site if it has one. Downloads still running then are logged and left behind.
+
+        Args:
+            site_name (str): The name of the website being scraped.
+        """
+        timeout = max(0, self.deadline - time.monotonic()) if self.deadline is not None else None
+        _, not_done = concurrent.futures.wait(self.pending_downloads, timeout=timeout)
+        if not_done:
+            self.logger.log(f"{len(not_done)} downloads did not finish before the site timeout",
+                            level='ERROR',
+                            site=site_name)
+        self.pending_downloads = []
+
     def _scrape_items(self, scrape, *args):
         """
         This function scrapes elements from a website using the initialized scrapers.
@@ -239,104 +469,82 @@ class Methods:
 
         url_site, site_name = Utils.load_site_config(site)
 
-        link_from_excel, title_from_excel = Utils().get_existing_data(site_name)
-
-        driver = Utils.setup_chrome_driver(headless=config.get("headless"))
-        driver.get(url_site)
-        driver.implicitly_wait(5)
-
-        buttons = InteractWithButtons(driver, site_name)
-        buttons.enter_button()
-        buttons.second_enter_button()
+        self.catalog.ensure_site(site_name, self.storage)
+        dedup = self._load_dedup_index(site_name)
 
-        if not driver.current_url == url_site:
+        pool = DriverPool.for_site(config)
+        driver = pool.acquire()
+        buttons = None
+        try:
+            pool.block_urls(driver, blocked_url_patterns(config))
             driver.get(url_site)
-
-        self.executor.submit(buttons.ad_button)
-
-        scrape, scrape_image, scrape_video = self._initialize_scrapers(site_name, site, driver=driver)
-        scraped_items = self._scrape_items(scrape, "element", "date", "title", "models", "image", "video")
-
-        href, date_el, title_el, models_names, image_home_page, vid_home_page = None, None, None, None, None, None
-        for items in zip_longest(*scraped_items.values()):
-            for key, item in zip(scraped_items.keys(), items):
-                if item is None:
-                    continue
-                if key == "element":
-                    href = extract_href_data(item, config)
-                    if href.startswith("https://join."):
-                        continue
-                    if "?" in href:
-                        href = href.split("?")[0]
-                elif key == "title":
-                    title_el = extract_title_data(item, config)
-            if href and href.endswith(".com/join") and title_el not in title_from_excel:
-                for key, item in zip(scraped_items.keys(), items):
-                    if item is None:
-                        continue
-                    if key == "date":
-                        date_el = extract_date_data(item, config)
-                    elif key == "models":
-                        models_names = extract_models_data(item, config)
-                    elif key == "image":
-                        image_home_page = extract_image_data(scrape_image, item, config)
-                    elif key == "video":
-                        vid_home_page = extract_video_data(scrape_video, item, config, driver=driver)
-                tags, description = None, None
-                link_to_src_image, path_image = scrape_image.scrape_image(image_home_page)
-                link_for_trailer, path_video = scrape_video.scrape_video(vid_home_page)
-                title = scrape.scrape_title(title_el)
-                date = scrape.scrape_date(date_el)
-                models = scrape.scrape_models(models_names)
-                self.data.append([
-                    site_name or '-',
-                    date or '-',
-                    title or '-',
-                    description or '-',
-                    tags or '-',
-                    models or '-',
-                    link_for_trailer or '-',
-                    href or '-',
-                    link_to_src_image or '-',
-                    path_image or '-',
-                    path_video or '-'
-                ])
-            elif all(href not in link for link in link_from_excel):
-                for key, item in zip(scraped_items.keys(), items):
-                    if item is None:
+            driver.implicitly_wait(5)
+
+            buttons = InteractWithButtons(driver, site_name)
+            buttons.enter_button()
+            buttons.second_enter_button()
+
+            if not driver.current_url == url_site:
+                driver.get(url_site)
+
+            self.executor.submit(buttons.ad_button)
+
+            scrape, scrape_image, scrape_video = self._initialize_scrapers(site_name, site, driver=driver)
+            # Hovering over the items needs their WebElements, so move_to_video sites are not batched.
+            batched = config.get("batch_extraction") and not config.get("move_to_video")
+            scrape_listing = scrape.scrape_records if batched else functools.partial(self._scrape_items, scrape)
+            scraped_items = scrape_listing("element", "date", "title", "models", "image", "video")
+            if auto_route_enabled(config) and self.routes.get(site_name) is None:
+                self._detect_route(site_name, url_site, driver, scrape, scraped_items)
+
+            href, date_el, title_el, models_names, image_home_page, vid_home_page = None, None, None, None, None, None
+            # Rows are kept in listing order: detail pages reserve their slot and fill it later.
+            # In incremental mode the walk stops at the first known item, and goes to the
+            # next listing page only while all items are new.
+            crawl = IncrementalCrawl(self.catalog, site_name, config)
+            pages = ListingPages(config, crawl)
+            detail_pages = []
+            page_url = url_site
+            while True:
+                found_items, known_rows = len(scraped_items.get("element") or []), len(self.data)
+                for items in zip_longest(*scraped_items.values()):
+                    for key, item in zip(scraped_items.keys(), items):
+                        if item is None:
+                            continue
+                        if key == "element":
+                            href = extract_href_data(item, config)
+                            if href.startswith("https://join."):
+                                continue
+                            if "?" in href:
+                                href = href.split("?")[0]
+                        elif key == "title":
+                            title_el = extract_title_data(item, config)
+                        elif key == "date" and crawl.needs_date:
+                            date_el = extract_date_data(item, config)
+                    listing_date = scrape.dates.normalize(date_el) if crawl.needs_date else None
+                    if crawl.is_known(dedup, href, title_el, listing_date):
+                        if crawl.reached:
+                            break
                         continue
-                    if key == "date":
-                        date_el = extract_date_data(item, config)
-                    elif key == "title":
-                        title_el = extract_title_data(item, config)
-                    elif key == "models":
-                        models_names = extract_models_data(item, config)
-                    elif key == "image":
-                        image_home_page = extract_image_data(
-                            scrape_image, item, config)
-                    elif key == "video":
-                        vid_home_page = extract_video_data(scrape_video, item, config, driver=driver)
-                main_window = driver.current_window_handle
-                driver.execute_script(f"window.open('{href}', '_blank');")
-                windows = driver.window_handles
-                for window in windows:
-                    if window != main_window:
-                        driver.switch_to.window(window)
-                        link_to_src_image, path_image = scrape_image.scrape_image(
-                            image_home_page)
-                        buttons.click_video()
+                    if href and href.endswith(".com/join"):
+                        for key, item in zip(scraped_items.keys(), items):
+                            if item is None:
+                                continue
+                            if key == "date":
+                                date_el = extract_date_data(item, config)
+                            elif key == "models":
+                                models_names = extract_models_data(item, config)
+                            elif key == "image":
+                                image_home_page = extract_image_data(scrape_image, item, config)
+                            elif key == "video":
+                                vid_home_page = extract_video_data(scrape_video, item, config, driver=driver, waits=buttons.waits)
+                        tags, description = None, None
+                        link_to_src_image, path_image = scrape_image.scrape_image(image_home_page)
                         link_for_trailer, path_video = scrape_video.scrape_video(vid_home_page)
-                        gobackvp = config.get("gobackvp")
-                        if gobackvp:
-                            driver.execute_script("window.history.go(-1)")
-                        buttons.expand_desc_button()
                         title = scrape.scrape_title(title_el)
                         date = scrape.scrape_date(date_el)
-                        description = scrape.scrape_description()
-                        buttons.expand_tags_button()
-                        tags = scrape.scrape_tags()
                         models = scrape.scrape_models(models_names)
-                        self.data.append([
+                        self._append_row([
                             site_name or '-',
                             date or '-',
                             title or '-',
@@ -349,13 +557,83 @@ class Methods:
                             path_image or '-',
                             path_video or '-'
                         ])
-                        driver.close()
-                        driver.switch_to.window(main_window)
-
-        self.executor.shutdown(wait=False)
-        driver.quit()
-
-        Utils.save_scraped_data(self.data, site_name)
+                    else:
+                        for key, item in zip(scraped_items.keys(), items):
+                            if item is None:
+                                continue
+                            if key == "date":
+                                date_el = extract_date_data(item, config)
+                            elif key == "title":
+                                title_el = extract_title_data(item, config)
+                            elif key == "models":
+                                models_names = extract_models_data(item, config)
+                            elif key == "image":
+                                image_home_page = extract_image_data(
+                                    scrape_image, item, config)
+                            elif key == "video":
+                                vid_home_page = extract_video_data(scrape_video, item, config, driver=driver, waits=buttons.waits)
+                        detail_pages.append({
+                            "href": href,
+                            "date_el": date_el,
+                            "title_el": title_el,
+                            "models_names": models_names,
+                            "image_home_page": image_home_page,
+                            "vid_home_page": vid_home_page,
+                        })
+                        self.data.append(None)
+
+                if not pages.should_continue(found_items, len(self.data) - known_rows):
+                    break
+                if pages.scrolling:
+                    # The items loaded before stay in the DOM: only the ones after them are new.
+                    seen = {key: len(items) for key, items in scraped_items.items()}
+                    if not pages.scroll(scrape):
+                        break
+                    scraped_items = scrape_listing("element", "date", "title", "models", "image", "video")
+                    scraped_items = {key: items[seen.get(key, 0):] for key, items in scraped_items.items()}
+                    continue
+                page_url = pages.open_next(scrape, page_url)
+                if page_url is None:
+                    break
+                scraped_items = scrape_listing("element", "date", "title", "models", "image", "video")
+
+            # Up to detail_tabs detail pages are open at once: the next page starts loading
+            # in a background tab as soon as one is scraped and closed.
+            main_window = driver.current_window_handle
+            detail_tabs = max(1, int(config.get("detail_tabs") or 1))
+            slots = [index for index, row in enumerate(self.data) if row is None]
+            waiting = iter(zip(slots, detail_pages))
+            open_tabs = deque()
+            for slot, detail in islice(waiting, detail_tabs):
+                open_tabs.append((slot, detail, self._open_tab(driver, detail["href"])))
+            while open_tabs:
+                slot, detail, tab = open_tabs.popleft()
+                if tab is not None:
+                    driver.switch_to.window(tab)
+                    self.data[slot] = self._register_downloads(self._scrape_detail_tab(
+                        site_name, config, detail, scrape, scrape_image, scrape_video, buttons))
+                    driver.close()
+                    driver.switch_to.window(main_window)
+                else:
+                    self.logger.log(f"Detail page {detail['href']} could not be opened",
+                                    level='ERROR',
+                                    site=site_name)
+                for slot, detail in islice(waiting, 1):
+                    open_tabs.append((slot, detail, self._open_tab(driver, detail["href"])))
+            failed = sum(row is None for row in self.data)
+            self.data = [row for row in self.data if row is not None]
+        finally:
+            if buttons is not None:
+                buttons.stop()
+            self.executor.shutdown(wait=True)
+            pool.release(driver, origins=(url_site,))
+
+        self._wait_for_downloads(site_name)
+        self.storage.save(self.data, site_name)
+        self.catalog.record(site_name, self.data)
+        # The mark only moves after a run which scraped every new item it found.
+        if not failed:
+            crawl.update(self.data)
         Utils.log_elapsed_time(start_time, site)
 
     def method_lxml(self, site):
@@ -377,70 +655,72 @@ class Methods:
 
         url_site, site_name = Utils.load_site_config(site)
 
-        link_from_excel, title_from_excel = Utils.get_existing_data(site_name)
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9,bg;q=0.8',
-        }
-        response = requests.get(url_site, headers=headers)
-        if response.status_code == 200:
-            html_content = response.content
-            tree = html.fromstring(html_content)
-            scrape, scrape_image, scrape_video = self._initialize_scrapers(site_name, site, tree=tree)
-            scraped_items = self._scrape_items(scrape, "element", "date", "title", "models", "image", "video")
-
+        self.catalog.ensure_site(site_name, self.storage)
+        dedup = self._load_dedup_index(site_name)
+
+        # Sites routed away from Selenium replay the cookies set by their enter button.
+        headers = cookie_header(config.get("route_cookies"))
+        response = self.fetcher.fetch(url_site, headers=headers, site=site_name)
+        if response is None or response.status_code != 200:
+            self.logger.log("Listing page could not be loaded",
+                            level='CRITICAL',
+                            site=site_name)
+            Utils.log_elapsed_time(start_time, site)
+            return None
+        # A listing unchanged since the last completed run (a 304 answered from the cache,
+        # or the same body) has nothing new: the whole site is skipped.
+        listing = response.content
+        if self.fetcher.cache is not None and self.fetcher.cache.is_unchanged(url_site, listing):
+            self.logger.log("Listing page unchanged since the last run",
+                            level='INFO',
+                            site=site_name)
+            Utils.log_elapsed_time(start_time, site)
+            return None
+        tree = html.fromstring(listing)
+        scrape, scrape_image, scrape_video = self._initialize_scrapers(site_name, site, tree=tree)
+        scraped_items = self._scrape_items(scrape, "element", "date", "title", "models", "image", "video")
+        if config.get("routed") and not scraped_items.get("element"):
+            self.routes.clear(site_name)
+            self.logger.log("No elements in the plain HTML anymore, the site goes back to method_selenium",
+                            level='WARNING',
+                            site=site_name)
+
+        # First pass: pick the new items from the listing pages. In incremental mode the
+        # walk stops at the first known item, and goes to the next page only while all items are new.
+        crawl = IncrementalCrawl(self.catalog, site_name, config)
+        pages = ListingPages(config, crawl)
+        timed_out = False
+        candidates = []
+        page_url = url_site
         href, date_el, title_el, models_names, image_home_page, vid_home_page = None, None, None, None, None, None
-        for items in zip_longest(*scraped_items.values()):
-            for key, item in zip(scraped_items.keys(), items):
-                if item is None:
-                    continue
-                if key == "element":
-                    href = extract_href_data(item, config)
-                    if href.startswith("https://join."):
-                        continue
-                    if "?" in href:
-                        href = href.split("?")[0]
-                elif key == "title":
-                    title_el = extract_title_data(item, config)
-            if href and href.endswith(".com/join") and title_el not in title_from_excel:
+        while True:
+            found_items, known_candidates = len(scraped_items.get("element") or []), len(candidates)
+            for items in zip_longest(*scraped_items.values()):
                 for key, item in zip(scraped_items.keys(), items):
                     if item is None:
                         continue
-                    if key == "date":
+                    if key == "element":
+                        href = extract_href_data(item, config)
+                        if href.startswith("https://join."):
+                            continue
+                        if "?" in href:
+                            href = href.split("?")[0]
+                    elif key == "title":
+                        title_el = extract_title_data(item, config)
+                    elif key == "date" and crawl.needs_date:
                         date_el = extract_date_data(item, config)
-                    elif key == "models":
-                        models_names = extract_models_data(item, config)
-                    elif key == "image":
-                        image_home_page = extract_image_data(scrape_image, item, config)
-                    elif key == "video":
-                        vid_home_page = extract_video_data(scrape_video, item, config)
-                tags, description = None, None
-                link_to_src_image, path_image = scrape_image.scrape_image(image_home_page)
-                link_for_trailer, path_video = scrape_video.scrape_video(vid_home_page)
-                title = scrape.scrape_title(title_el)
-                date = scrape.scrape_date(date_el)
-                models = scrape.scrape_models(models_names)
-                self.data.append([
-                    site_name or '-',
-                    date or '-',
-                    title or '-',
-                    description or '-',
-                    tags or '-',
-                    models or '-',
-                    link_for_trailer or '-',
-                    href or '-',
-                    link_to_src_image or '-',
-                    path_image or '-',
-                    path_video or '-'
-                ])
-            elif all(href not in link for link in link_from_excel):
+                listing_date = scrape.dates.normalize(date_el) if crawl.needs_date else None
+                if crawl.is_known(dedup, href, title_el, listing_date):
+                    if crawl.reached:
+                        break
+                    continue
+                detail_url = None if href and href.endswith(".com/join") else absolute_url(page_url, href)
                 for key, item in zip(scraped_items.keys(), items):
                     if item is None:
                         continue
                     if key == "date":
                         date_el = extract_date_data(item, config)
-                    elif key == "title":
+                    elif key == "title" and detail_url:
                         title_el = extract_title_data(item, config)
                     elif key == "models":
                         models_names = extract_models_data(item, config)
@@ -448,30 +728,88 @@ class Methods:
                         image_home_page = extract_image_data(scrape_image, item, config)
                     elif key == "video":
                         vid_home_page = extract_video_data(scrape_video, item, config)
-                response, href = RequestsHandling(url_site, href).main()
-                if response:
-                    inner_html_content = response.content
-                inner_tree = html.fromstring(inner_html_content)
-                link_to_src_image, path_image = scrape_image.scrape_image(image_home_page, inner_tree=inner_tree)
-                link_for_trailer, path_video = scrape_video.scrape_video(vid_home_page, inner_tree=inner_tree)
-                title = scrape.scrape_title(title_el, inner_tree=inner_tree)
-                date = scrape.scrape_date(date_el, inner_tree=inner_tree)
+                candidates.append({
+                    "href": href,
+                    "detail_url": detail_url,
+                    "date_el": date_el,
+                    "title_el": title_el,
+                    "models_names": models_names,
+                    "image_home_page": image_home_page,
+                    "vid_home_page": vid_home_page,
+                })
+
+            if not pages.should_continue(found_items, len(candidates) - known_candidates):
+                break
+            if self._out_of_time(site_name):
+                timed_out = True
+                break
+            next_url, response = pages.fetch_next(self.fetcher, scrape, page_url, headers=headers, site=site_name)
+            if next_url is None:
+                break
+            page_url = next_url
+            scrape.tree = html.fromstring(response.content)
+            scraped_items = self._scrape_items(scrape, "element", "date", "title", "models", "image", "video")
+
+        # Fetch the detail pages of all new items concurrently.
+        detail_urls = [candidate["detail_url"] for candidate in candidates if candidate["detail_url"] and not timed_out]
+        detail_responses = dict(zip(detail_urls, self.fetcher.fetch_many(detail_urls, headers=headers, site=site_name)))
+
+        # Second pass: scrape the items in listing order.
+        failed = 0
+        for candidate in candidates:
+            if not timed_out and self._out_of_time(site_name):
+                timed_out = True
+            if timed_out:
+                break
+            href = candidate["href"]
+            if candidate["detail_url"] is None:
+                tags, description = None, None
+                link_to_src_image, path_image = scrape_image.scrape_image(candidate["image_home_page"])
+                link_for_trailer, path_video = scrape_video.scrape_video(candidate["vid_home_page"])
+                title = scrape.scrape_title(candidate["title_el"])
+                date = scrape.scrape_date(candidate["date_el"])
+                models = scrape.scrape_models(candidate["models_names"])
+            else:
+                response = detail_responses.get(candidate["detail_url"])
+                if response is not None and response.is_success:
+                    href = candidate["detail_url"]
+                else:
+                    response, href = RequestsHandling(url_site, href, cache=self.fetcher.cache).main()
+                if not response:
+                    self.logger.log(f"Detail page {candidate['detail_url']} could not be loaded",
+                                    level='ERROR',
+                                    site=site_name)
+                    failed += 1
+                    continue
+                inner_tree = html.fromstring(response.content)
+                link_to_src_image, path_image = scrape_image.scrape_image(candidate["image_home_page"], inner_tree=inner_tree)
+                link_for_trailer, path_video = scrape_video.scrape_video(candidate["vid_home_page"], inner_tree=inner_tree)
+                title = scrape.scrape_title(candidate["title_el"], inner_tree=inner_tree)
+                date = scrape.scrape_date(candidate["date_el"], inner_tree=inner_tree)
                 description = scrape.scrape_description(inner_tree=inner_tree)
                 tags = scrape.scrape_tags(inner_tree=inner_tree)
-                models = scrape.scrape_models(models_names, inner_tree=inner_tree)
-                self.data.append([
-                    site_name or '-',
-                    date or '-',
-                    title or '-',
-                    description or '-',
-                    tags or '-',
-                    models or '-',
-                    link_for_trailer or '-',
-                    href or '-',
-                    link_to_src_image or '-',
-                    path_image or '-',
-                    path_video or '-'
-                ])
-
-        Utils.save_scraped_data(self.data, site_name)
+                models = scrape.scrape_models(candidate["models_names"], inner_tree=inner_tree)
+            self._append_row([
+                site_name or '-',
+                date or '-',
+                title or '-',
+                description or '-',
+                tags or '-',
+                models or '-',
+                link_for_trailer or '-',
+                href or '-',
+                link_to_src_image or '-',
+                path_image or '-',
+                path_video or '-'
+            ])
+
+        self._wait_for_downloads(site_name)
+        self.storage.save(self.data, site_name)
+        self.catalog.record(site_name, self.data)
+        # The mark only moves after a run which scraped every new item it found. Items which failed
+        # or were not reached are not in the catalog, so the next run scrapes them, even with the same listing.
+        if not failed and not timed_out:
+            crawl.update(self.data)
+        if self.fetcher.cache is not None and not failed and not timed_out:
+            self.fetcher.cache.complete(url_site, listing)
         Utils.log_elapsed_time(start_time, site)
@@ -0,0 +1,264 @@
+import os
+import glob
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+from common import DataFrames, Paths, Utils, CustomLogger
+
+
+COLUMNS = ["Site", "Date", "Title", "Description", "Tags", "Models", "Video to embed",
+           "Link for video", "Link for image", "Path image", "Path video"]
+
+# Partition holding rows imported from the legacy Excel workbooks. It sorts before every real day.
+LEGACY_PARTITION = "0000-00-00"
+
+
+class ExcelStorage:
+    """
+    Legacy storage backend which keeps the whole history in Excel workbooks.
+    Every save reads and rewrites the per-site and the daily workbook.
+    """
+
+    def save(self, data, site_name):
+        """
+        Saves scraped data to the daily and the per-site Excel files.
+
+        Args:
+            data (list): Rows to be saved.
+            site_name (str): Name of the site for which the data is being saved.
+
+        Returns:
+            None
+        """
+        Utils.save_scraped_data(data, site_name)
+
+    def existing_data(self, site_name):
+        """
+        Retrieves existing links and titles for a given site.
+
+        Args:
+            site_name (str): The name of the site.
+
+        Returns:
+            tuple: A tuple containing lists of existing links and titles.
+        """
+        return Utils.get_existing_data(site_name)
+
+    def read_site(self, site_name):
+        """
+        Reads the whole history of a site.
+
+        Args:
+            site_name (str): The name of the site.
+
+        Returns:
+            DataFrame: The stored rows of the site.
+        """
+        return DataFrames().save_dataframe_with_retry([], "site", site_name)
+
+    def export_site(self, site_name):
+        """
+        The Excel backend already keeps the per-site workbook up to date.
+
+        Returns:
+            str: Path to the per-site Excel file.
+        """
+        return Paths().set_site_scrapped(site_name)
+
+    def export_daily(self, partition_date=None):
+        """
+        The Excel backend already keeps the daily workbook up to date.
+
+        Returns:
+            str: Path to the daily Excel file.
+        """
+        return Paths().set_daily_scrapped()
+
+
+class ParquetStorage:
+    """
+    Append-only storage backend. Every save writes a new Parquet part file
+    partitioned by site and day, so the cost of a save depends only on the
+    number of new rows. Excel workbooks are produced on demand by the export methods.
+
+    Layout:
+        Store/site=<site name>/date=<YYYY-MM-DD>/part-<timestamp>-<pid>.parquet
+    """
+
+    def __init__(self):
+        self.paths = Paths()
+        self.logger = CustomLogger()
+
+    @staticmethod
+    def get_partition_date():
+        """
+        Returns current date in the partition format: year-month-day (2020-01-08)
+        """
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def site_dir(self, site_name):
+        """
+        Returns the directory holding all partitions of a site.
+        """
+        return os.path.join(self.paths.store_dir, f"site={site_name}")
+
+    def _write_part(self, df, site_name, partition_date):
+        """
+        Writes a DataFrame as a new part file. The file is written under a temporary
+        name and renamed, so readers never see a partially written part. Missing values
+        are written as the '-' placeholder of the rows, not as "nan" or "None".
+
+        Returns:
+            str: Path to the written part file.
+        """
+        folder_path = os.path.join(self.site_dir(site_name), f"date={partition_date}")
+        os.makedirs(folder_path, exist_ok=True)
+        part_name = f"part-{datetime.now().strftime('%H%M%S%f')}-{os.getpid()}.parquet"
+        part_path = os.path.join(folder_path, part_name)
+        tmp_path = part_path + ".tmp"
+        df.fillna('-').astype(str).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+        return part_path
+
+    @staticmethod
+    def _read_parts(part_paths):
+        """
+        Reads part files and returns them newest first, as the Excel workbooks were kept.
+        """
+        if not part_paths:
+            return pd.DataFrame(columns=COLUMNS)
+        frames = [pd.read_parquet(part_path) for part_path in sorted(part_paths, reverse=True)]
+        return pd.concat(frames, ignore_index=True)
+
+    def _import_legacy_excel(self, site_name):
+        """
+        Imports the per-site Excel workbook of the legacy backend once, so the
+        history scraped before the switch is still used for deduplication.
+        """
+        legacy_path = os.path.join(self.paths.desktop_dir, f"{site_name}.xlsx")
+        if os.path.isdir(self.site_dir(site_name)) or not os.path.exists(legacy_path):
+            return None
+        legacy_df = pd.read_excel(legacy_path)
+        if legacy_df.empty:
+            return None
+        legacy_df = legacy_df.reindex(columns=COLUMNS)
+        part_path = self._write_part(legacy_df, site_name, LEGACY_PARTITION)
+        self.logger.log(f"Imported {len(legacy_df)} rows from {legacy_path}",
+                        level='INFO',
+                        site="Storage")
+        return part_path
+
+    def save(self, data, site_name):
+        """
+        Appends scraped data as a new part file of today's partition.
+
+        Args:
+            data (list): Rows to be saved.
+            site_name (str): Name of the site for which the data is being saved.
+
+        Returns:
+            str: Path to the written part file, or None if there was nothing to save.
+        """
+        if not data:
+            return None
+        self._import_legacy_excel(site_name)
+        df = pd.DataFrame(data, columns=COLUMNS)
+        part_path = self._write_part(df, site_name, self.get_partition_date())
+        self.logger.log(f"Saved {len(df)} rows at {part_path}",
+                        level='PATH',
+                        site="Storage")
+        return part_path
+
+    def read_site(self, site_name):
+        """
+        Reads the whole history of a site.
+
+        Args:
+            site_name (str): The name of the site.
+
+        Returns:
+            DataFrame: The stored rows of the site, newest first.
+        """
+        self._import_legacy_excel(site_name)
+        part_paths = glob.glob(os.path.join(self.site_dir(site_name), "date=*", "*.parquet"))
+        return self._read_parts(part_paths)
+
+    def read_daily(self, partition_date=None):
+        """
+        Reads the rows of all sites saved on a given day.
+
+        Args:
+            partition_date (str): Day in the partition format, defaults to today.
+
+        Returns:
+            DataFrame: The rows saved on that day.
+        """
+        partition_date = partition_date or self.get_partition_date()
+        part_paths = glob.glob(os.path.join(self.paths.store_dir, "site=*", f"date={partition_date}", "*.parquet"))
+        return self._read_parts(part_paths)
+
+    def existing_data(self, site_name):
+        """
+        Retrieves existing links and titles for a given site.
+
+        Args:
+            site_name (str): The name of the site.
+
+        Returns:
+            tuple: A tuple containing lists of existing links and titles.
+        """
+        df = self.read_site(site_name)
+        return df['Link for video'].tolist(), df['Title'].tolist()
+
+    def export_site(self, site_name):
+        """
+        Exports the whole history of a site to its Excel workbook.
+
+        Returns:
+            str: Path to the exported Excel file.
+        """
+        output_path = os.path.join(self.paths.desktop_dir, f"{site_name}.xlsx")
+        self.read_site(site_name).to_excel(output_path, index=False)
+        return output_path
+
+    def export_daily(self, partition_date=None):
+        """
+        Exports the rows of all sites saved on a given day to the daily Excel workbook.
+
+        Returns:
+            str: Path to the exported Excel file.
+        """
+        partition_date = partition_date or self.get_partition_date()
+        display_date = datetime.strptime(partition_date, "%Y-%m-%d").strftime("%b %d, %Y")
+        output_path = os.path.join(self.paths.raw_data_dir, f"DailyScrapped+{display_date}.xlsx")
+        self.read_daily(partition_date).to_excel(output_path, index=False)
+        return output_path
+
+
+STORAGE_BACKENDS = {
+    "excel": ExcelStorage,
+    "parquet": ParquetStorage,
+}
+
+
+def get_storage():
+    """
+    Returns the storage backend selected in the settings.
+    """
+    backend = Utils.load_settings("storage").get("backend", "parquet")
+    return STORAGE_BACKENDS[backend.lower()]()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export stored scraped data to Excel.")
+    parser.add_argument("--site", help="Export the whole history of a site.")
+    parser.add_argument("--date", help="Export all sites for a day (YYYY-MM-DD), defaults to today.")
+    args = parser.parse_args()
+
+    storage = get_storage()
+    if args.site:
+        print(storage.export_site(args.site))
+    else:
+        print(storage.export_daily(args.date))
@@ -0,0 +1,279 @@
+import time
+import threading
+from collections import deque
+
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        TimeoutException, WebDriverException)
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from common import Utils, CustomLogger
+
+
+# Starts recording the time of the last DOM mutation, once per page.
+DOM_OBSERVER_SCRIPT = """
+if (!window.__lastMutation) {
+    window.__lastMutation = Date.now();
+    new MutationObserver(() => { window.__lastMutation = Date.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return Date.now() - window.__lastMutation;
+"""
+
+# Returns the number of network requests started by the page and the readiness of the document.
+NETWORK_STATE_SCRIPT = """
+return [performance.getEntriesByType('resource').length, document.readyState];
+"""
+
+# Checks whether an element is inside the viewport.
+IN_VIEWPORT_SCRIPT = """
+const rect = arguments[0].getBoundingClientRect();
+return rect.bottom > 0 && rect.right > 0 && rect.top < window.innerHeight && rect.left < window.innerWidth;
+"""
+
+
+class AdaptiveTimeout:
+    """
+    Timeouts learned from how long the waits of a site actually take.
+    The timeout of a kind of wait is a multiple of its slowest recent duration,
+    bounded by the settings, so fast sites stop waiting early and slow sites
+    get more time. Waits which time out are not recorded, so optional elements
+    which are missing and pages which never settle do not stretch the timeouts.
+    Durations are shared by all the waits of a site in the process.
+    """
+    _samples = {}
+    _lock = threading.Lock()
+
+    def __init__(self, site_name, settings):
+        """
+        Initializes the AdaptiveTimeout object.
+
+        Args:
+            site_name (str): Name of the site.
+            settings (dict): The "waits" section of the settings.
+        """
+        self.site_name = site_name
+        self.default = settings.get("default_timeout", 10)
+        self.minimum = settings.get("min_timeout", 3)
+        self.maximum = settings.get("max_timeout", 30)
+        self.factor = settings.get("factor", 2.0)
+        self.min_samples = settings.get("min_samples", 5)
+        self.history = settings.get("history", 50)
+
+    def _durations(self, kind):
+        """
+        Returns the recent durations of a kind of wait.
+        """
+        key = (self.site_name, kind)
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.history)
+            return self._samples[key]
+
+    def timeout(self, kind, default=None):
+        """
+        Returns the timeout of a kind of wait.
+
+        Args:
+            kind (str): The kind of wait, e.g. "click" or "dom_stable".
+            default (float, optional): The timeout used until enough durations are known.
+
+        Returns:
+            float: The timeout in seconds.
+        """
+        durations = self._durations(kind)
+        with self._lock:
+            if len(durations) < self.min_samples:
+                return default or self.default
+            slowest = max(durations)
+        return min(self.maximum, max(self.minimum, slowest * self.factor))
+
+    def record(self, kind, duration):
+        """
+        Records the duration of a wait.
+        """
+        durations = self._durations(kind)
+        with self._lock:
+            durations.append(duration)
+
+
+class PageWaits:
+    """
+    Waits for the state of the page instead of sleeping for fixed times:
+    elements being clickable or in view, attributes changing, the network
+    going idle and the DOM no longer changing. Timeouts are learned per site.
+    """
+
+    def __init__(self, driver, site_name):
+        """
+        Initializes the PageWaits object.
+
+        Args:
+            driver: Selenium WebDriver instance.
+            site_name (str): Name of the site.
+        """
+        settings = Utils.load_settings("waits")
+        self.driver = driver
+        self.site_name = site_name
+        self.poll_frequency = settings.get("poll_frequency", 0.1)
+        self.quiet_time = settings.get("quiet_ms", 300) / 1000
+        self.timeouts = AdaptiveTimeout(site_name, settings)
+        self.logger = CustomLogger()
+
+    def until(self, kind, condition, timeout=None, ignored=None):
+        """
+        Waits for a condition and records how long it took.
+
+        Args:
+            kind (str): The kind of wait, timeouts are learned per kind.
+            condition (callable): Called with the driver until it returns a truthy value.
+            timeout (float, optional): Timeout used until the timeout of the kind is learned.
+            ignored (tuple, optional): Exceptions ignored while polling.
+
+        Returns:
+            The value returned by the condition.
+
+        Raises:
+            TimeoutException: If the condition is not met in time.
+        """
+        limit = self.timeouts.timeout(kind, timeout)
+        start = time.monotonic()
+        result = WebDriverWait(self.driver, limit, poll_frequency=self.poll_frequency,
+                               ignored_exceptions=ignored).until(condition)
+        self.timeouts.record(kind, time.monotonic() - start)
+        return result
+
+    def settle(self, kind, condition, timeout=None):
+        """
+        Waits for a condition without failing when it is not met.
+
+        Returns:
+            bool: True if the condition was met in time.
+        """
+        try:
+            self.until(kind, condition, timeout)
+            return True
+        except TimeoutException:
+            return False
+        except WebDriverException as e:
+            self.logger.log(f"Wait for {kind} failed",
+                            level='WARNING',
+                            site=self.site_name,
+                            exception=e)
+            return False
+
+    def present(self, locator, kind="present", timeout=None):
+        """
+        Waits for an element to be present.
+
+        Raises:
+            TimeoutException: If the element does not appear in time.
+        """
+        return self.until(kind, EC.presence_of_element_located(locator), timeout)
+
+    def in_view(self, element, offset=0):
+        """
+        Scrolls an element into view, optionally shifted by an offset in pixels,
+        and waits until it is inside the viewport.
+        """
+        self.driver.execute_script("arguments[0].scrollIntoView();", element)
+        if offset:
+            self.driver.execute_script("window.scrollBy(0, arguments[0]);", offset)
+        return self.settle("in_view", lambda driver: driver.execute_script(IN_VIEWPORT_SCRIPT, element), 2)
+
+    def clickable(self, element, timeout=None):
+        """
+        Waits for an element to be visible and enabled.
+
+        Returns:
+            bool: True if the element became clickable in time.
+        """
+        return self.settle("clickable", EC.element_to_be_clickable(element), timeout or 3)
+
+    def dom_stable(self, timeout=None):
+        """
+        Waits until the DOM has not changed for the quiet time.
+
+        Returns:
+            bool: True if the DOM settled in time.
+        """
+        return self.settle(
+            "dom_stable",
+            lambda driver: driver.execute_script(DOM_OBSERVER_SCRIPT) >= self.quiet_time * 1000,
+            timeout or 3)
+
+    def network_idle(self, timeout=None):
+        """
+        Waits until the document is loaded and the page has started no new
+        requests for the quiet time.
+
+        Returns:
+            bool: True if the network went idle in time.
+        """
+        state = {"count": -1, "since": time.monotonic()}
+
+        def idle(driver):
+            count, ready_state = driver.execute_script(NETWORK_STATE_SCRIPT)
+            now = time.monotonic()
+            if count != state["count"]:
+                state["count"], state["since"] = count, now
+                return False
+            return ready_state == "complete" and now - state["since"] >= self.quiet_time
+
+        return self.settle("network_idle", idle, timeout or 5)
+
+    def attribute_changed(self, element, attribute, old_value=None, timeout=None):
+        """
+        Waits until an attribute of an element is set and differs from its old value.
+
+        Returns:
+            The new value of the attribute, or the current one if it did not change in time.
+        """
+        def changed(driver):
+            value = element.get_attribute(attribute)
+            return value if value and value != old_value else False
+
+        try:
+            return self.until("attribute_changed", changed, timeout or 5)
+        except (TimeoutException, StaleElementReferenceException):
+            try:
+                return element.get_attribute(attribute)
+            except StaleElementReferenceException:
+                return old_value
+
+    def refind(self, locator, timeout=None):
+        """
+        Finds an element again after it went stale, waiting for the page to attach its replacement.
+
+        Returns:
+            WebElement: The element, or None if it does not reappear in time.
+        """
+        try:
+            return self.until("refind", lambda driver: driver.find_element(*locator), timeout,
+                              ignored=(NoSuchElementException, StaleElementReferenceException))
+        except TimeoutException:
+            return None
+
+    def read_attribute(self, locator, attribute, timeout=None):
+        """
+        Reads an attribute of an element, finding it again while it is stale.
+
+        Returns:
+            str: The value of the attribute, or None if the element does not reappear in time.
+        """
+        try:
+            return self.until("refind", lambda driver: [driver.find_element(*locator).get_attribute(attribute)],
+                              timeout or 5, ignored=(NoSuchElementException, StaleElementReferenceException))[0]
+        except TimeoutException:
+            return None
+
+    def click(self, element, settle=True):
+        """
+        Scrolls to an element, waits for it to be clickable and clicks it with JavaScript.
+        Afterwards waits for the DOM to settle, unless disabled.
+        """
+        self.in_view(element)
+        self.clickable(element)
+        self.driver.execute_script("arguments[0].click();", element)
+        if settle:
+            self.dom_stable()
@@ -0,0 +1,131 @@
+import threading
+
+from lxml import etree
+
+from common import Utils, CustomLogger
+
+
+def iter_config_xpaths(config):
+    """
+    Yields the XPath expressions of a site configuration: the "*_xpaths" lists,
+    the lists of the "*_info" blocks and the keys of the "home" block of
+    "models_info", which are XPaths themselves.
+
+    Args:
+        config (dict): The configuration of a site.
+
+    Yields:
+        tuple: The configuration key and the XPath expression.
+    """
+    def leaves(value):
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                yield from leaves(item)
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from leaves(item)
+
+    for key, value in config.items():
+        if key.endswith("_xpaths"):
+            for xpath in leaves(value):
+                yield key, xpath
+        elif key.endswith("_info") and isinstance(value, dict):
+            for location, attributes in value.items():
+                if key == "models_info" and location == "home" and isinstance(attributes, dict):
+                    for xpath in attributes:
+                        yield key, xpath
+                    continue
+                for xpath in leaves(attributes):
+                    yield key, xpath
+
+
+class XPathCache:
+    """
+    Compiled XPath expressions of a site. The expressions of the configuration are
+    compiled once when the configuration is loaded, so lxml does not parse them again
+    for every item and page, and invalid expressions are reported before scraping starts.
+    One cache is kept per site and rebuilt when the configuration file changes.
+    Lookups of a single element (find) keep the ElementPath semantics of tree.find.
+    """
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, config):
+        """
+        Initializes the XPathCache object and compiles the XPaths of the configuration.
+
+        Args:
+            config (dict): The configuration of a site.
+        """
+        self.site_name = Utils.extract_site_name(config.get("site") or "") or "XPathCache"
+        self.compiled = {}
+        self.invalid = set()
+        self.lock = threading.Lock()
+        self.logger = CustomLogger()
+        for key, xpath in iter_config_xpaths(config):
+            if xpath:
+                self.compile(xpath, key)
+
+    @classmethod
+    def for_config(cls, config):
+        """
+        Returns the cache of a site configuration, building it on first use
+        and again when the configuration has been reloaded.
+        """
+        site = config.get("site")
+        with cls._caches_lock:
+            cached = cls._caches.get(site)
+            if cached is None or cached[0] is not config:
+                cached = (config, cls(config))
+                cls._caches[site] = cached
+            return cached[1]
+
+    def compile(self, xpath, key=None):
+        """
+        Returns the compiled form of an XPath, compiling it on first use.
+
+        Args:
+            xpath (str): The XPath expression.
+            key (str, optional): The configuration key of the expression, used for logging.
+
+        Returns:
+            XPath: The compiled expression, or None if it is invalid.
+        """
+        compiled = self.compiled.get(xpath)
+        if compiled is not None or xpath in self.invalid:
+            return compiled
+        with self.lock:
+            try:
+                compiled = etree.XPath(xpath)
+            except etree.XPathSyntaxError as e:
+                self.invalid.add(xpath)
+                self.logger.log(f"Invalid XPath{f' in {key}' if key else ''}: {xpath}",
+                                level='ERROR',
+                                site=self.site_name,
+                                exception=e)
+                return None
+            self.compiled[xpath] = compiled
+        return compiled
+
+    def xpath(self, tree, xpath):
+        """
+        Evaluates an XPath on a tree or element.
+
+        Returns:
+            list: The results, empty if the expression is invalid.
+        """
+        compiled = self.compile(xpath)
+        if compiled is None:
+            return []
+        return compiled(tree)
+
+    @staticmethod
+    def find(tree, path):
+        """
+        Returns the first element matching a path on a tree or element, or None if there is none.
+        The path is evaluated as ElementPath, like the tree.find calls this replaces, not as
+        XPath: lxml keeps its own cache of parsed ElementPath expressions.
+        """
+        return tree.find(path)